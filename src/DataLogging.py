@@ -44,9 +44,11 @@ def read_thread(queue: Queue, IWR1443: ReadIWR14xx, SLEEPTIME, stop_event: Event
         batch = BatchedData()
         visual = VisualManager()
 
-        while not stop_event.is_set():
-            t0 = time.time()
+        # Frame period and deadline of the read loop (ns)
+        period = int(SLEEPTIME / 2 * 1e9)
+        deadline = time.monotonic_ns() + period
 
+        while not stop_event.is_set():
             dataOk, _, detObj = IWR1443.read()
             if dataOk and frame_number % frame_select == 0:
                 queue.put((frame_number, detObj))
@@ -54,7 +56,7 @@ def read_thread(queue: Queue, IWR1443: ReadIWR14xx, SLEEPTIME, stop_event: Event
             frame_number += 1
 
             if dataOk:
-                now = time.time()
+                now = time.perf_counter()
                 trackbuffer.dt = now - trackbuffer.t
                 trackbuffer.t = now
                 # Apply scene constraints, translation
@@ -64,16 +66,21 @@ def read_thread(queue: Queue, IWR1443: ReadIWR14xx, SLEEPTIME, stop_event: Event
                     # Tracking Module
                     trackbuffer.track(effective_data, batch)
 
-                visual.update(trackbuffer, detObj)
+                visual.update(trackbuffer, detObj=detObj)
             else:
-                visual.update(trackbuffer)
+                visual.update(trackbuffer, detObj=None)
 
             sys.stdout.write(f"\rFrame Number: {frame_number}")
             sys.stdout.flush()
 
-            t_code = time.time() - t0
-            t_sleep = max(0, SLEEPTIME / 2 - t_code)
-            time.sleep(t_sleep)
+            # Sleep until the next frame deadline (on the monotonic clock, so that the pace does not drift)
+            now = time.monotonic_ns()
+            if deadline > now:
+                time.sleep((deadline - now) / 1e9)
+                deadline += period
+            else:
+                # Running late, so start the next period from now instead of catching up
+                deadline = now + period
 
     except KeyboardInterrupt:
         stop_event.set()
@@ -1,11 +1,9 @@
 import numpy as np
 import constants as const
-import math
 import time
-from filterpy.kalman import KalmanFilter
+from collections import deque
 from Utils import (
     cluster_pointcloud_dbscan,
-    Buffer,
 )
 from typing import List
 from enum import Enum
@@ -20,44 +18,67 @@ class Status(Enum):
 STATIC = True
 DYNAMIC = False
 
+# Fixed palette of track colors (for visualization purposes), cycled through as tracks are created
+TRACK_COLORS = np.random.default_rng(0).random((256, 3))
+TRACK_COLORS.setflags(write=False)
 
-class BatchedData(Buffer):
+
+class BatchedData:
     """
     A class to manage and combine frames into a batch.
 
+    The frames are kept back to back in a single preallocated array, so adding a frame only copies
+    the new points, and the batch is always a contiguous view of that array.
+
     Attributes:
     ----------
+    - size (int): The maximum number of frames in the batch.
     - effective_data (numpy.ndarray): An array to store effective data frames.
 
     Methods:
     -------
-    - empty(): Reset the buffer and create an empty effective_data array.
     - add_frame(new_data: numpy.ndarray): Add a new frame of data to the buffer.
     - clear(): Clear the buffer and reset effective_data.
     - change_buffer_size(new_size): Change the size of the buffer.
     - pop_frame(): Remove the oldest frame from the buffer.
     """
 
+    # Initial number of points the storage can hold; it grows when a batch does not fit.
+    INIT_CAPACITY = 1024
+
     def __init__(self):
-        super().__init__(const.FB_FRAMES_BATCH + 1, init_val=np.empty((0, 8)))
-        self.effective_data = np.empty((0, 8))
+        self.size = const.FB_FRAMES_BATCH + 1
+        self._storage = np.empty((self.INIT_CAPACITY, 8), dtype=const.PC_DTYPE)
+        # The buffered frames occupy storage[_start:_end]; their lengths, from the oldest to the newest
+        self._start = 0
+        self._end = 0
+        self._frames = deque()
+        self.effective_data = self._storage[:0]
 
     def add_frame(self, new_data: np.array):
         """
         Add a new frame of data to the buffer.
         """
-        while len(self.buffer) >= self.size:
+        while len(self._frames) >= self.size:
             self.pop_frame()
 
-        super().append(new_data)
-        self.effective_data = np.concatenate(list(self.buffer), axis=0)
+        length = len(new_data)
+        if self._end + length > len(self._storage):
+            self._compact(length)
+
+        np.copyto(self._storage[self._end : self._end + length], new_data)
+        self._end += length
+        self._frames.append(length)
+
+        self.effective_data = self._storage[self._start : self._end]
 
     def clear(self):
         """
         Clear the buffer and reset effective_data.
         """
-        self.buffer.clear()
-        self.effective_data = np.array([])
+        self._frames.clear()
+        self._start = self._end = 0
+        self.effective_data = self._storage[:0]
 
     def change_buffer_size(self, new_size):
         """
@@ -69,34 +90,150 @@ class BatchedData(Buffer):
         """
         Remove the oldest frame from the buffer.
         """
-        if len(self.buffer) > 0:
-            self.buffer.popleft()
+        if len(self._frames) > 0:
+            self._start += self._frames.popleft()
+
+    def _compact(self, length):
+        """
+        Move the buffered frames to the beginning of the storage, so that a new frame of the given
+        length fits after them. The storage is reallocated if it is too small.
+        """
+        buffered = self._end - self._start
+
+        if buffered + length > len(self._storage):
+            storage = np.empty(
+                (max(2 * len(self._storage), buffered + length), 8), dtype=const.PC_DTYPE
+            )
+            storage[:buffered] = self._storage[self._start : self._end]
+            self._storage = storage
+        else:
+            # numpy handles the overlapping source and destination of the move
+            self._storage[:buffered] = self._storage[self._start : self._end]
+
+        self._start, self._end = 0, buffered
+
+
+def kf_predict(x, P, F, Q):
+    """
+    Kalman filter predict step.
+
+    Works both on a single state and on a stack of states that share the same motion model.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        State estimate(s) - (dim_x, 1) or (T, dim_x, 1).
+    P : np.ndarray
+        State covariance(s) - (dim_x, dim_x) or (T, dim_x, dim_x).
+    F : np.ndarray
+        State transition matrix.
+    Q : np.ndarray
+        Process noise covariance matrix.
+
+    Returns
+    -------
+    tuple
+        The predicted (a priori) state(s) and covariance(s).
+    """
+    return F @ x, F @ P @ F.T + Q
+
+def kf_update(x, P, z, H, R):
+    """
+    Kalman filter update step.
 
+    Parameters
+    ----------
+    x : np.ndarray
+        Predicted state estimate - (dim_x, 1).
+    P : np.ndarray
+        Predicted state covariance - (dim_x, dim_x).
+    z : np.ndarray
+        Measurement - (dim_z, 1).
+    H : np.ndarray
+        Measurement matrix.
+    R : np.ndarray
+        Measurement noise covariance matrix.
+
+    Returns
+    -------
+    tuple
+        The updated (a posteriori) state and covariance.
+    """
+    # Innovation and its covariance
+    y = z - H @ x
+    PHT = P @ H.T
+    S = H @ PHT + R
+
+    # Kalman gain (K = P H^T S^-1), solved for rather than inverting S, as S is symmetric
+    K = np.linalg.solve(S, PHT.T).T
+
+    # Covariance update as P - K (H P), reusing H P = (P H^T)^T of the symmetric P,
+    # instead of the more expensive (I - K H) P (I - K H)^T + K R K^T (Joseph) form
+    return x + K @ y, P - K @ PHT.T
 
-class KalmanState(KalmanFilter):
+
+class KalmanState:
     """
     A class representing the state of a Kalman filter for motion tracking.
 
+    The predict and update steps of the linear Kalman filter are written out directly for the
+    configured motion model, instead of going through a generic filter implementation.
+    All steps write into the state arrays in place, so that they can be views into the
+    contiguous storage of a TrackBuffer.
+
     Attributes:
     ----------
-    - centroid: The centroid of the track used for initializing this Kalman filter instance.
+    - x, P: The a posteriori state estimate and its covariance.
+    - x_prior, P_prior: The a priori (predicted) state estimate and its covariance.
+    - F, H, Q, R: The state transition, measurement, process noise and measurement noise matrices.
 
     Methods:
     -------
     - __init__(centroid: np.ndarray): Initialize the Kalman filter with default parameters based on the centroid.
+    - predict(F: np.ndarray, Q: np.ndarray): Predict the next state.
+    - set_prediction(x: np.ndarray, P: np.ndarray): Set an externally computed a priori state and covariance.
+    - update(z: np.ndarray, R: np.ndarray): Update the state with a new measurement.
     """
 
     def __init__(self, centroid: np.ndarray):
-        super().__init__(
-            dim_x=const.MOTION_MODEL.KF_DIM[0], dim_z=const.MOTION_MODEL.KF_DIM[1]
-        )
+        dim_x, dim_z = const.MOTION_MODEL.KF_DIM
 
         self.F = const.MOTION_MODEL.KF_F(1)
         self.H = const.MOTION_MODEL.KF_H
         self.Q = const.MOTION_MODEL.KF_Q_DISCR(1)
-        self.R = np.eye(const.MOTION_MODEL.KF_DIM[1]) * const.KF_R_STD**2
-        self.x = np.array([const.MOTION_MODEL.STATE_VEC(centroid)]).T
-        self.P = np.eye(const.MOTION_MODEL.KF_DIM[0]) * const.KF_P_INIT
+        self.R = np.eye(dim_z) * const.KF_R_STD**2
+        self.x = np.array(const.MOTION_MODEL.STATE_VEC(centroid), dtype=float).reshape(-1, 1)
+        self.P = np.eye(dim_x) * const.KF_P_INIT
+
+        # The priors keep their default values until the first prediction.
+        self.x_prior = np.zeros((dim_x, 1))
+        self.P_prior = np.eye(dim_x)
+
+    def predict(self, F: np.ndarray = None, Q: np.ndarray = None):
+        """
+        Predict the next state (a priori estimate).
+        """
+        F = self.F if F is None else F
+        Q = self.Q if Q is None else Q
+
+        self.set_prediction(*kf_predict(self.x, self.P, F, Q))
+
+    def set_prediction(self, x: np.ndarray, P: np.ndarray):
+        """
+        Set an externally computed a priori state and covariance, as the predict step would.
+        """
+        self.x[...] = x
+        self.P[...] = P
+        self.x_prior[...] = self.x
+        self.P_prior[...] = self.P
+
+    def update(self, z: np.ndarray, R: np.ndarray = None):
+        """
+        Update the state (a posteriori estimate) with a new measurement.
+        """
+        R = self.R if R is None else R
+
+        self.x[...], self.P[...] = kf_update(self.x, self.P, np.reshape(z, (-1, 1)), self.H, R)
 
 
 class PointCluster:
@@ -114,20 +251,31 @@ class PointCluster:
 
     Methods:
     -------
-    - __init__(pointcloud: numpy.ndarray):
+    - __init__(pointcloud: numpy.ndarray, centroid=None, min_vals=None, max_vals=None):
         Initialize PointCluster with a given pointcloud.
 
     """
 
-    def __init__(self, pointcloud: np.array):
+    def __init__(
+        self,
+        pointcloud: np.array,
+        centroid: np.ndarray = None,
+        min_vals: np.ndarray = None,
+        max_vals: np.ndarray = None,
+    ):
         """
         Initialize PointCluster with a given pointcloud.
+
+        The statistics can be passed in when they are already computed for a batch of clusters.
         """
         self.pointcloud = pointcloud
         self.point_num = pointcloud.shape[0]
-        self.centroid = np.mean(pointcloud[:, :6], axis=0)
-        self.min_vals = np.min(pointcloud[:, :6], axis=0)
-        self.max_vals = np.max(pointcloud[:, :6], axis=0)
+
+        # Only the kinematic (x, y, z, x', y', z') columns take part in the statistics
+        points = pointcloud[:, :6]
+        self.centroid = points.mean(axis=0) if centroid is None else centroid
+        self.min_vals = points.min(axis=0) if min_vals is None else min_vals
+        self.max_vals = points.max(axis=0) if max_vals is None else max_vals
 
 class ClusterTrack:
     """
@@ -161,19 +309,16 @@ class ClusterTrack:
     track_status : Status
         The status of the track (STATIC or DYNAMIC).
     color : numpy.ndarray
-        Random color assigned to the track for visualization (for visualization purposes).
+        Color assigned to the track from the TRACK_COLORS palette (for visualization purposes).
 
     Methods
     -------
-    compute_cartesian_velocity()
-        Compute the cartesian velocity of the track using the a priori state, with respect to the x and y dimensions.
+    compute_squared_cartesian_velocity()
+        Compute the squared cartesian velocity of the track using the a priori state, with respect to the x and y dimensions.
     
     __get_num_dynamic_points_associated(pointcloud)
         Get the number of dynamic points associated with the track.
 
-    predict_state(dt)
-        Predict the state of the Kalman filter based on the time multiplier.
-
     _estimate_point_num()
         Estimate the number of points in the cluster.
 
@@ -203,12 +348,17 @@ class ClusterTrack:
 
     """
 
+    # Index of the palette color given to the next created track
+    _color_index = 0
+
     def __init__(self, cluster: PointCluster):
         self.N_est = 0
         self.spread_est = np.zeros(const.MOTION_MODEL.KF_DIM[1])
         self.group_disp_est = (
             np.eye(const.MOTION_MODEL.KF_DIM[1]) * const.KF_GROUP_DISP_EST_INIT
         )
+        # Measurement covariance matrix, built from spread_est on demand
+        self._Rm_cache = None
         self.cluster = cluster
         self.batch = BatchedData()
         self.state = KalmanState(cluster.centroid)
@@ -218,15 +368,16 @@ class ClusterTrack:
 
         self.track_status = Status.DYNAMIC if self.num_dynamic_points_associated_last > const.NUM_DYNAMIC_POINTS_THRESHOLD else Status.STATIC
 
-        self.color = np.random.rand(
-            3,
-        )
-        
-    def compute_cartesian_velocity(self):
+        self.color = TRACK_COLORS[ClusterTrack._color_index % len(TRACK_COLORS)]
+        ClusterTrack._color_index += 1
+
+    def compute_squared_cartesian_velocity(self):
         """
-        Compute the cartesian velocity of the track using the a priory state, with respect to the x and y dimensions.
+        Compute the squared cartesian velocity of the track using the a priory state, with respect to the x and y dimensions.
+
+        The squared value is compared against squared thresholds, so no square root is taken.
         """
-        return math.sqrt(np.sum((self.state.x_prior[3:5] ** 2)))
+        return self.state.x_prior[3, 0] ** 2 + self.state.x_prior[4, 0] ** 2
     
     def _get_num_dynamic_points_associated(self, pointcloud: np.array):
         """
@@ -257,28 +408,25 @@ class ClusterTrack:
         Estimate the spread of measurements in each dimension.
         """
         if self.cluster.point_num > 1:
-            for m in range(len(self.cluster.min_vals)):
-                # Difference between max and min values in the cluster (in one dimension)
-                spread = self.cluster.max_vals[m] - self.cluster.min_vals[m]
-
-                # Unbiased spread estimation - the more points we have, the tighter the spread we create is
-                spread = (
-                    # TODO: Use my_good_points instead of self.cluster.point_num
-                    spread * (self.cluster.point_num + 1) / (self.cluster.point_num - 1)
-                )
-
-                # Map the spread to a range between 1 and 2 times between the configured spread limits
-                spread = min(2 * const.KF_SPREAD_LIM[m], spread)
-                spread = max(const.KF_SPREAD_LIM[m], spread)
-
-                if spread > self.spread_est[m]:
-                    # This would most likely be the case when we have few samples
-                    self.spread_est[m] = spread
-                else:
-                    # Weighed average between calculated spread and the previous spread estimation
-                    self.spread_est[m] = (1.0 - const.KF_A_SPR) * self.spread_est[
-                        m
-                    ] + const.KF_A_SPR * spread
+            # Difference between max and min values in the cluster (in each dimension)
+            spread = self.cluster.max_vals - self.cluster.min_vals
+
+            # Unbiased spread estimation - the more points we have, the tighter the spread we create is
+            # TODO: Use my_good_points instead of self.cluster.point_num
+            spread *= (self.cluster.point_num + 1) / (self.cluster.point_num - 1)
+
+            # Map the spread to a range between 1 and 2 times between the configured spread limits
+            spread_lim = np.asarray(const.KF_SPREAD_LIM)
+            spread = np.clip(spread, spread_lim, 2 * spread_lim)
+
+            # A larger spread (most likely the case when we have few samples) is taken as is,
+            # otherwise, use a weighed average between calculated spread and the previous spread estimation
+            self.spread_est[:] = np.where(
+                spread > self.spread_est,
+                spread,
+                (1.0 - const.KF_A_SPR) * self.spread_est + const.KF_A_SPR * spread,
+            )
+            self._Rm_cache = None
 
     def _get_D(self):
         """
@@ -290,24 +438,17 @@ class ClusterTrack:
             Dispersion matrix for the cluster.
         """
         dimension = const.MOTION_MODEL.KF_DIM[1]
-        pointcloud = self.cluster.pointcloud
-        centroid = self.cluster.centroid
-        disp = np.zeros((dimension, dimension), dtype="float")
-
-        for i in range(dimension):
-            for j in range(dimension):
-                disp[i, j] = np.mean(
-                    (pointcloud[:, i] - centroid[i]) * (pointcloud[:, j] - centroid[j])
-                )
+        # Centered pointcloud - (N, dimension)
+        Xc = self.cluster.pointcloud[:, :dimension] - self.cluster.centroid
 
-        return disp
+        return (Xc.T @ Xc) / Xc.shape[0]
 
     def _estimate_group_disp_matrix(self):
         """
         Estimate the group dispersion matrix.
         """
         a = self.cluster.point_num / self.N_est
-        self.group_disp_est = (1 - a) * self.group_disp_est + a * self._get_D()
+        self.group_disp_est[...] = (1 - a) * self.group_disp_est + a * self._get_D()
 
     def _get_Rc(self):
         """
@@ -364,32 +505,20 @@ class ClusterTrack:
         numpy.ndarray
             Measurement covariance matrix for the cluster.
         """
-        return np.diag(((self.spread_est / 2) ** 2))
-
-    def predict_state(self, dt: float):
-        """
-        Predict the state of the Kalman filter based on the time multiplier.
+        # The spread only changes in _estimate_measurement_spread, which drops the cached matrix.
+        if self._Rm_cache is None:
+            self._Rm_cache = np.diag(((self.spread_est / 2) ** 2))
+        return self._Rm_cache
 
-        Parameters
-        ----------
-        dt : float
-            Time multiplier for the prediction.
-        """
-        if self.track_status is Status.DYNAMIC:
-            self.state.predict(
-                F=const.MOTION_MODEL.KF_F(dt),
-                Q=const.MOTION_MODEL.KF_Q_DISCR(dt),
-            )
-        
     def update_state(self):
         """
         Update the track.
         """
         # TODO: Calculate my_good_points - dynamic (Doppler more than 0) and unique (association with only one track)
-        vel = self.compute_cartesian_velocity()
+        vel_sq = self.compute_squared_cartesian_velocity()
         if not self.num_points_associated_last:
             if self.track_status is Status.DYNAMIC:
-                if vel < const.MIN_VELOCITY_STOP_NO_POINTS:
+                if vel_sq < const.MIN_VELOCITY_STOP_NO_POINTS_SQ:
                     # If the track is dynamic and no points are associated, force zero velocity.
                     self.state.x[3:6] = 0
                     # If the track is dynamic and no points are associated, transition to STATIC.
@@ -404,13 +533,13 @@ class ClusterTrack:
                 # TODO: Update confidence.
                 return
             else:
-                if vel < const.MIN_VELOCITY_STOP_NO_DYNAMIC_POINTS:
+                if vel_sq < const.MIN_VELOCITY_STOP_NO_DYNAMIC_POINTS_SQ:
                     # If the track is dynamic and no dynamic points are associated, force zero velocity.
                     self.state.x[3:6] = 0
                     # If the track is dynamic and no dynamic points are associated, transition to STATIC.
                     self.track_status = Status.STATIC 
                     # TODO: If there are many STATIC points, increase confidence.
-                elif vel < const.MIN_VELOCITY_SLOW_DOWN:
+                elif vel_sq < const.MIN_VELOCITY_SLOW_DOWN_SQ:
                     # If the track is dynamic and no dynamic points are associated, decrease the velocity.
                     self.state.x[3:6] *= 0.5
                     self._move_target()
@@ -429,11 +558,11 @@ class ClusterTrack:
         Move the target.
         """
         self.track_status = Status.DYNAMIC
-        z = np.array(self.cluster.centroid)
+        z = self.cluster.centroid
         self.state.update(z, R=self._get_Rc())
 
-        variance = z[:1] - self.state.x[:1, 0]
-        self.state.x[:1, 0] += variance * 0.4
+        # Pull the x position a bit further towards the measured centroid (plain scalar arithmetic)
+        self.state.x[0, 0] += 0.4 * (z[0] - self.state.x[0, 0])
 
 class TrackBuffer:
     """
@@ -449,7 +578,12 @@ class TrackBuffer:
         Time multiplier used for predicting states. Indicates the time passed since the previous
         valid observed frame.
     t : float
-        Current time when the TrackBuffer is instantiated / updated.
+        Current time when the TrackBuffer is instantiated / updated (time.perf_counter in the live
+        loops, the frame timestamps offline).
+    _X, _P, _X_prior, _P_prior : numpy.ndarray
+        Contiguous (T, ...) storage of the Kalman states and covariances of all effective tracks.
+    _spread, _disp : numpy.ndarray
+        Contiguous (T, ...) storage of the spread and group dispersion estimates of all effective tracks.
 
     Methods
     -------
@@ -465,8 +599,11 @@ class TrackBuffer:
     _add_tracks(new_clusters)
         Add new tracks to the buffer.
 
+    _pack_tracks()
+        Pack the state of all effective tracks into the contiguous buffer storage.
+
     _predict_all()
-        Predict the state of all effective tracks.
+        Predict the state of all effective DYNAMIC tracks in a single batched step.
 
     _update_all()
         Update the state of all effective tracks.
@@ -492,7 +629,37 @@ class TrackBuffer:
         self.effective_tracks: List[ClusterTrack] = []
         self.next_track_id = 0
         self.dt = 0
-        self.t = time.time()
+        self.t = time.perf_counter()
+        self._pack_tracks()
+
+    def _pack_tracks(self):
+        """
+        Pack the state of all effective tracks into the contiguous buffer storage.
+
+        The per-track state arrays are replaced by views into the (T, ...) buffers, so that
+        the batched steps can work on all tracks at once, while each track still reads and
+        updates its own state in place.
+        """
+        dim_x, dim_z = const.MOTION_MODEL.KF_DIM
+        tracks = self.effective_tracks
+
+        def stack(arrays, shape):
+            return np.stack(arrays) if arrays else np.empty((0, *shape))
+
+        self._X = stack([track.state.x for track in tracks], (dim_x, 1))
+        self._P = stack([track.state.P for track in tracks], (dim_x, dim_x))
+        self._X_prior = stack([track.state.x_prior for track in tracks], (dim_x, 1))
+        self._P_prior = stack([track.state.P_prior for track in tracks], (dim_x, dim_x))
+        self._spread = stack([track.spread_est for track in tracks], (dim_z,))
+        self._disp = stack([track.group_disp_est for track in tracks], (dim_z, dim_z))
+
+        for k, track in enumerate(tracks):
+            track.state.x = self._X[k]
+            track.state.P = self._P[k]
+            track.state.x_prior = self._X_prior[k]
+            track.state.P_prior = self._P_prior[k]
+            track.spread_est = self._spread[k]
+            track.group_disp_est = self._disp[k]
 
     def _find_closest_track(self, full_set: np.array):
         """
@@ -507,39 +674,43 @@ class TrackBuffer:
         -------
         np.ndarray
             An array representing the associated track (entry) for each point (index).
-            If no track is associated with a point, the entry is set to None.
+            If no track is associated with a point, the entry is set to -1.
         """
-        bidding_score = np.empty((full_set.shape[0], len(self.effective_tracks)))
-        associated_track_for = np.full(full_set.shape[0], None, dtype=object)
+        if not self.effective_tracks:
+            return np.full(full_set.shape[0], -1, dtype=np.int32)
 
-        for j, track in enumerate(self.effective_tracks):
-            H_i = np.dot(const.MOTION_MODEL.KF_H, track.state.x_prior).flatten()
-            # Group residual covariance matrix
-            C_g_j = track.state.P_prior[:6, :6] + track.get_Rm() + track.group_disp_est
-
-            for i, point in enumerate(full_set):
-                # Innovation for each measurement
-                y_ij = np.array(point[:6]) - H_i
-
-                # Mahalanobis Distance (squared)
-                d_squared = np.dot(np.dot(y_ij.T, np.linalg.inv(C_g_j)), y_ij)
-
-                # bidding score (squared)
-                bidding_score[i][j] = np.log(np.abs(np.linalg.det(C_g_j))) + d_squared
-
-                # Perform Gate threshold check
-                if bidding_score[i][j] < const.TR_GATE:
-                    # Just choose the closest mahalanobis distance
-                    if associated_track_for[i] is None:
-                        associated_track_for[i] = j
-                    else:
-                        if (
-                            bidding_score[i][j]
-                            < bidding_score[i][int(associated_track_for[i])]
-                        ):
-                            associated_track_for[i] = j
-
-        return associated_track_for
+        # Predicted measurements of all tracks - (T, 6)
+        # The measurement matrix only selects the leading (x, y, z, x', y', z') entries of the state.
+        H_all = self._X_prior[:, :6, 0]
+
+        # Measurement covariance matrices of all tracks - (T, 6, 6)
+        Rm_all = np.zeros_like(self._disp)
+        diagonal = np.arange(Rm_all.shape[-1])
+        Rm_all[:, diagonal, diagonal] = (self._spread / 2) ** 2
+
+        # Group residual covariance matrices - (T, 6, 6)
+        C_all = self._P_prior[:, :6, :6] + Rm_all + self._disp
+        # Cholesky factors (C = L L^T) give both the log-determinant and the Mahalanobis distance
+        # without forming the inverse - (T, 6, 6)
+        L = np.linalg.cholesky(C_all)
+        logdet = 2 * np.log(np.diagonal(L, axis1=-2, axis2=-1)).sum(axis=-1)
+
+        # Innovation for each track and each measurement - (T, 6, N)
+        Y = (full_set[None, :, :6] - H_all[:, None, :]).transpose(0, 2, 1)
+
+        # Whitened innovations (L z = y), so that the squared Mahalanobis distance is |z|^2
+        Z = np.linalg.solve(L, Y)
+
+        # Bidding score (squared Mahalanobis distance plus log-determinant) - (N, T)
+        bidding_score = (Z**2).sum(axis=1).T + logdet[None, :]
+
+        # Perform Gate threshold check and just choose the closest mahalanobis distance.
+        # NOTE: Every track is an extended target that owns many points, so this is a many-to-one
+        # association. A one-to-one assignment (e.g. Hungarian) would leave a single point per track.
+        closest_track = bidding_score.argmin(axis=1).astype(np.int32)
+        closest_track[bidding_score.min(axis=1) >= const.TR_GATE] = -1
+
+        return closest_track
 
     def _add_tracks(self, new_clusters):
         """
@@ -550,19 +721,55 @@ class TrackBuffer:
         new_clusters : list
             List of new clusters to be added as tracks.
         """
-        for new_cluster in new_clusters:
-            new_track = ClusterTrack(PointCluster(np.array(new_cluster)))
+        if not len(new_clusters):
+            return
+
+        # Compute the statistics of all new clusters at once on the stacked points
+        clouds = [np.asarray(new_cluster) for new_cluster in new_clusters]
+        sizes = np.array([len(cloud) for cloud in clouds])
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        stacked = np.concatenate(clouds, axis=0)[:, :6]
+
+        centroids = np.add.reduceat(stacked, starts, axis=0) / sizes[:, None]
+        min_vals = np.minimum.reduceat(stacked, starts, axis=0)
+        max_vals = np.maximum.reduceat(stacked, starts, axis=0)
+
+        for k, cloud in enumerate(clouds):
+            new_track = ClusterTrack(
+                PointCluster(cloud, centroids[k], min_vals[k], max_vals[k])
+            )
             # new_track.id = self.next_track_id
             self.next_track_id += 1
             self.effective_tracks.append(new_track)
 
+        self._pack_tracks()
+
     def _predict_all(self):
         """
-        Predict the state of all effective tracks.
+        Predict the state of all effective DYNAMIC tracks in a single batched step.
+
+        All tracks share the same motion model, so their states and covariances are stacked
+        and propagated together instead of running a separate filter prediction per track.
         """
-        for track in self.effective_tracks:
-            # TODO: Maybe, accumulate dt for this track in case it is not updated.
-            track.predict_state(self.dt)
+        # TODO: Maybe, accumulate dt for this track in case it is not updated.
+        dynamic = np.array(
+            [track.track_status is Status.DYNAMIC for track in self.effective_tracks],
+            dtype=bool,
+        )
+        if not dynamic.any():
+            return
+
+        # The measured dt jitters around the frame period, so it is quantized to 0.1 ms for the
+        # cached model matrices to be reused between frames.
+        dt = round(self.dt, 4)
+        F = const.MOTION_MODEL.KF_F(dt)
+        Q = const.MOTION_MODEL.KF_Q_DISCR(dt)
+
+        # States - (T, dim_x, 1) and covariances - (T, dim_x, dim_x) of the DYNAMIC tracks
+        self._X[dynamic], self._P[dynamic] = kf_predict(self._X[dynamic], self._P[dynamic], F, Q)
+
+        self._X_prior[dynamic] = self._X[dynamic]
+        self._P_prior[dynamic] = self._P[dynamic]
 
     def _update_all(self):
         """
@@ -586,16 +793,22 @@ class TrackBuffer:
         tuple
             Tuple containing unassigned points and clustered clouds.
         """
-        unassigned = np.empty((0, 8), dtype="float")
-        clusters = [[] for _ in range(len(self.effective_tracks))]
         # Simple matrix has len = len(full_set) and has the index of the chosen track.
         point_to_closest_track_assignment = self._find_closest_track(full_set)
 
-        for i, point in enumerate(full_set):
-            if point_to_closest_track_assignment[i] is None:
-                unassigned = np.append(unassigned, [point], axis=0)
-            else:
-                clusters[point_to_closest_track_assignment[i]].append(point)
+        # Bucket the points by track in a single sort; the unassigned points (-1) come first.
+        order = np.argsort(point_to_closest_track_assignment, kind="stable")
+        boundaries = np.searchsorted(
+            point_to_closest_track_assignment[order],
+            np.arange(-1, len(self.effective_tracks) + 1),
+        )
+        sorted_set = full_set[order]
+
+        unassigned = sorted_set[boundaries[0] : boundaries[1]]
+        clusters = [
+            sorted_set[boundaries[j + 1] : boundaries[j + 2]]
+            for j in range(len(self.effective_tracks))
+        ]
 
         return unassigned, clusters
 
@@ -616,7 +829,7 @@ class TrackBuffer:
         unassigned, clouds = self._get_gated_clouds(full_set)
 
         for j, track in enumerate(self.effective_tracks):
-            track.associate_pointcloud(np.array(clouds[j]))
+            track.associate_pointcloud(clouds[j])
 
         return unassigned
 
@@ -635,14 +848,18 @@ class TrackBuffer:
         -------
         None
         """
-        # Prediction Step
-        self._predict_all()
+        if self.effective_tracks:
+            # Prediction Step
+            self._predict_all()
 
-        # Association Step
-        unassigned = self._assign_points_to_tracks_and_get_unassigned(pointcloud)
+            # Association Step
+            unassigned = self._assign_points_to_tracks_and_get_unassigned(pointcloud)
 
-        # Update Step
-        self._update_all()
+            # Update Step
+            self._update_all()
+        else:
+            # Without tracks, there is nothing to predict or update and every point is unassigned.
+            unassigned = pointcloud
 
         # TODO: Move Allocation step before maintenance.
 
@@ -1,51 +1,18 @@
 from sklearn.cluster import DBSCAN
-from collections import deque
+from sklearn.neighbors import NearestNeighbors
 import constants as const
 import math
-import csv
 import numpy as np
+import pandas as pd
 import os
+from queue import Queue
+from threading import Thread
 
-class Buffer:
-    """
-    Buffer with a fixed size that automatically discards the oldest elements when new elements are added.
+# Columns of the experiment log files, as written by DataLogging
+_LOG_COLUMNS = ["frame", "x", "y", "z", "doppler", "peakVal", "posix"]
 
-    Attributes
-    ----------
-    size : int
-        Maximum size of the buffer.
-
-    buffer : collections.deque
-        Deque representing the circular buffer.
-
-    Methods
-    -------
-    append(item)
-        Add a new element to the buffer. If the buffer is full, the oldest element is removed.
-
-    get_max()
-        Get the maximum value in the buffer.
-
-    get_mean()
-        Get the mean value of the elements in the buffer.
-    """
-
-    def __init__(self, size, init_val=None):
-        self.size = size
-        self.buffer = deque(maxlen=size)
-        if init_val is None:
-            self.buffer.append(0)
-        else:
-            self.buffer.append(init_val)
-
-    def append(self, item):
-        self.buffer.append(item)
-
-    def get_max(self):
-        return np.max(self.buffer)
-
-    def get_mean(self):
-        return np.mean(self.buffer)
+# CuPy and the cuML DBSCAN, imported on first use (None until then, False if they are not installed)
+_GPU_DBSCAN = None
 
 class OfflineManager:
     """
@@ -58,16 +25,17 @@ class OfflineManager:
     frame_count : int
         The count of frames read so far.
     pointer : List[int]
-        A list containing two integers: the index of the last read frame and the index of the current file being read.
-    pointclouds : Dict[int, Dict[str, List[float]]]
-        A dictionary containing point cloud data for each frame.
+        A list containing two integers: the index of the next frame in the current file and the index of the current file being read.
+    pointclouds : Dict[int, Dict[str, np.ndarray]]
+        A dictionary containing point cloud data for each frame. Besides the per-column arrays, the
+        "points" entry holds the frame as an (N, 5) array, ready to be passed to normalize_data.
     last_frame : int or None
         The index of the last frame read from the experiment file, or None if the experiment has finished.
 
     Methods
     -------
     read_next_frames()
-        Read the next batch of frames from the experiment file.
+        Take the next batch of frames, parsed ahead by the background reader thread.
     get_data()
         Get the data for the current frame.
     is_finished() -> bool
@@ -78,66 +46,125 @@ class OfflineManager:
         self.experiment_path = experiment_path
         self.frame_count = 0
         self.pointer = [0, 1]
+
+        # The files are parsed by a background thread, one batch of frames ahead of the consumer
+        self._batches = Queue(maxsize=1)
+        self._finished = False
+        self._error = None
+        self._reader = Thread(target=self._read_ahead, daemon=True)
+        self._reader.start()
+
         self.read_next_frames()
 
+    def _read_ahead(self):
+        """
+        Parse the experiment files batch by batch and queue the batches, until the experiment ends.
+
+        An exception raised while parsing is queued in place of the batch, so that the consumer
+        re-raises it instead of waiting forever.
+        """
+        try:
+            self._load_file()
+            while True:
+                pointclouds, last_frame = self._parse_next_frames()
+                self._batches.put((pointclouds, last_frame))
+
+                if last_frame is None:
+                    break
+        except BaseException as e:
+            self._batches.put(e)
+
+    def _load_file(self):
+        """
+        Parse the whole current experiment file at once and index the rows of each frame.
+
+        Sets the file columns to None if the file does not exist.
+        """
+        file_path = os.path.join(self.experiment_path, f"{self.pointer[1]}.csv")
+        try:
+            data = pd.read_csv(file_path, header=None, names=_LOG_COLUMNS, engine="c")
+        except FileNotFoundError:
+            self._columns = None
+            return
+        except pd.errors.EmptyDataError:
+            data = pd.DataFrame({key: np.empty(0) for key in _LOG_COLUMNS})
+
+        frames = data["frame"].to_numpy()
+        if np.any(frames[1:] < frames[:-1]):
+            # Bucket the rows of each frame together, keeping their order within the frame
+            data = data.iloc[np.argsort(frames, kind="stable")]
+
+        self._columns = {key: data[key].to_numpy() for key in _LOG_COLUMNS}
+        # The (x, y, z, doppler, peakVal) values of all points, stacked once for the whole file
+        self._points = data[_LOG_COLUMNS[1:6]].to_numpy(dtype=float)
+
+        # The rows of a frame are now consecutive, so each frame is a (start, count) slice of the columns
+        self._framenums, self._starts, self._counts = np.unique(
+            self._columns["frame"], return_index=True, return_counts=True
+        )
+
     def read_next_frames(self):
         """
-        Read the next batch of frames from the given experiment file starting from the specified frame number.
+        Take the next batch of frames, parsed ahead by the background reader thread.
+
+        Waits for the batch if it is not parsed yet. Re-raises the exception of the reader thread
+        if parsing failed.
+        """
+        if self._error is not None:
+            raise self._error
+
+        if self._finished:
+            # The whole experiment has already been handed out
+            self.pointclouds, self.last_frame = {}, None
+            return
+
+        batch = self._batches.get()
+        if isinstance(batch, BaseException):
+            self._error = batch
+            raise batch
+
+        self.pointclouds, self.last_frame = batch
+        self._finished = self.last_frame is None
+
+    def _parse_next_frames(self):
         """
-        self.pointclouds = {}
-        self.last_frame = None
-
-        while len(self.pointclouds) < const.FB_READ_BUFFER_SIZE:
-            file_path = os.path.join(self.experiment_path, f"{self.pointer[1]}.csv")
-            try:
-                with open(file_path, "r") as file:
-                    csv_reader = csv.reader(file)
-                    for index, row in enumerate(csv_reader):
-                        # Pass previously parsed frames
-                        if index < self.pointer[0]:
-                            continue
-
-                        framenum = int(row[0])
-                        coords = [
-                            float(row[1]),
-                            float(row[2]),
-                            float(row[3]),
-                            float(row[4]),
-                            float(row[5]),
-                            int(row[6]),
-                        ]
-
-                        # Read only the frames in the specified range
-                        if framenum in self.pointclouds:
-                            # Append coordinates to the existing lists
-                            for key, value in zip(
-                                ["x", "y", "z", "doppler", "peakVal", "posix"], coords
-                            ):
-                                self.pointclouds[framenum][key].append(value)
-                        else:
-                            # If not, create a new dictionary for the framenum
-                            self.pointclouds[framenum] = {
-                                "x": [coords[0]],
-                                "y": [coords[1]],
-                                "z": [coords[2]],
-                                "doppler": [coords[3]],
-                                "peakVal": [coords[4]],
-                                "posix": [coords[5]],
-                            }
-
-                        self.last_frame = framenum
-
-                        if len(self.pointclouds) >= const.FB_READ_BUFFER_SIZE:
-                            # Break the loop once const.FB_READ_BUFFER_SIZE frames are read
-                            self.pointer[0] = index + 1
-                            break
-                    else:
-                        self.pointer[0] = 0
-                        self.pointer[1] += 1
-
-            except FileNotFoundError:
+        Parse the next batch of frames from the given experiment file starting from the specified frame number.
+
+        Returns
+        -------
+        pointclouds : dict
+            The point cloud data of each parsed frame.
+        last_frame : int or None
+            The index of the last parsed frame, or None if the experiment has finished.
+        """
+        pointclouds = {}
+        last_frame = None
+
+        while len(pointclouds) < const.FB_READ_BUFFER_SIZE:
+            if self._columns is None:
                 break
 
+            if self.pointer[0] >= len(self._framenums):
+                # Nothing is left in this file, continue with the next one
+                self.pointer[0] = 0
+                self.pointer[1] += 1
+                self._load_file()
+                continue
+
+            start = self._starts[self.pointer[0]]
+            stop = start + self._counts[self.pointer[0]]
+            framenum = int(self._framenums[self.pointer[0]])
+
+            # Every entry is a view of the file arrays, no data is copied
+            pointclouds[framenum] = {
+                key: self._columns[key][start:stop] for key in _LOG_COLUMNS[1:]
+            }
+            pointclouds[framenum]["points"] = self._points[start:stop]
+            last_frame = framenum
+            self.pointer[0] += 1
+
+        return pointclouds, last_frame
+
     def get_data(self):
         """
         Get the data for the current frame.
@@ -214,6 +241,41 @@ def calc_projection_points(x_origin, y_origin, z_origin):
 
     return x_proj, z_proj
 
+def calc_projection_points_batch(x_origin, y_origin, z_origin):
+    """
+    Calculate the screen projections of multiple points at once (see calc_projection_points).
+
+    Parameters
+    ----------
+    x_origin : np.ndarray
+        The reference point coordinates along the x axis.
+
+    y_origin : np.ndarray
+        The reference point coordinates along the y axis.
+
+    z_origin : np.ndarray
+        The reference point coordinates along the z (vertical) axis.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        The x and z coordinates of the projections of all points on the screen.
+    """
+    x_origin = np.asarray(x_origin, dtype=float)
+    y_origin = np.asarray(y_origin, dtype=float)
+    z_origin = np.asarray(z_origin, dtype=float)
+
+    x_dist = x_origin - const.M_X
+    y_dist = y_origin - const.M_Y
+    z_dist = z_origin - const.M_Z
+
+    # The division results are discarded by np.where where the distance is 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_proj = np.where(x_dist == 0, x_origin, -const.M_Y / (y_dist / x_dist) + const.M_X)
+        z_proj = np.where(z_dist == 0, z_origin, -const.M_Y / (y_dist / z_dist) + const.M_Z)
+
+    return x_proj, z_proj
+
 def calculate_euclidean_dist(p1, p2):
     """
     Calculate an altered Euclidean distance between two points in 3D space.
@@ -241,6 +303,149 @@ def calculate_euclidean_dist(p1, p2):
         + const.DB_Z_WEIGHT * ((p1[2] - p2[2]) ** 2)
     )
 
+def _scale_points(pointcloud):
+    """
+    Scale the z-axis of the points by sqrt(DB_Z_WEIGHT), so that the vertically weighted squared
+    distance of calculate_euclidean_dist becomes a plain squared Euclidean one.
+
+    Returns
+    -------
+    scaled : np.ndarray
+        The scaled (N, 3) coordinates, in const.PC_DTYPE.
+    y : np.ndarray
+        The y-coordinates of the points, used for the range weighting.
+    """
+    points = np.asarray(pointcloud, dtype=const.PC_DTYPE)
+    scaled = points[:, :3] * np.array([1, 1, math.sqrt(const.DB_Z_WEIGHT)], dtype=const.PC_DTYPE)
+    return scaled, points[:, 1]
+
+def calculate_euclidean_dist_matrix(pointcloud):
+    """
+    Calculate the altered Euclidean distance (see calculate_euclidean_dist) between all pairs of points.
+
+    Parameters
+    ----------
+    pointcloud : array-like
+        The 3D point cloud represented as a list or NumPy array.
+
+    Returns
+    -------
+    np.ndarray
+        The (N, N) matrix of the adjusted Euclidean distances, in const.PC_DTYPE.
+    """
+    scaled, y = _scale_points(pointcloud)
+    n = len(scaled)
+
+    # The matrix is accumulated in place, so that only one (N, N) temporary is needed besides it
+    dist = np.zeros((n, n), dtype=const.PC_DTYPE)
+    tmp = np.empty((n, n), dtype=const.PC_DTYPE)
+    for axis in range(3):
+        coord = scaled[:, axis]
+        np.subtract(coord[:, None], coord[None, :], out=tmp)
+        tmp *= tmp
+        dist += tmp
+
+    # Range weighting 1 - ((y_i + y_j) / 2) * DB_RANGE_WEIGHT
+    np.add(y[:, None], y[None, :], out=tmp)
+    tmp *= -const.DB_RANGE_WEIGHT / 2
+    tmp += 1
+    dist *= tmp
+    return dist
+
+def calculate_euclidean_dist_graph(pointcloud, eps):
+    """
+    Calculate the altered Euclidean distance (see calculate_euclidean_dist) between the pairs of
+    points which are at most eps apart, as a sparse neighbourhood graph.
+
+    The candidate pairs are found with a radius query on the scaled coordinates. The radius is
+    widened by the smallest range weight of the points, so that no pair within eps is missed.
+
+    Parameters
+    ----------
+    pointcloud : array-like
+        The 3D point cloud represented as a list or NumPy array.
+    eps : float
+        The maximum altered Euclidean distance of the neighbours.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        The (N, N) sparse matrix of the adjusted Euclidean distances of the neighbouring points.
+    """
+    scaled, y = _scale_points(pointcloud)
+
+    # The weight of a pair is the mean of the per-point weights, so it is at least their minimum
+    min_weight = 1 - y.max() * const.DB_RANGE_WEIGHT
+    radius = math.sqrt(eps / min_weight)
+
+    graph = NearestNeighbors(radius=radius).fit(scaled).radius_neighbors_graph(mode="distance")
+
+    rows = np.repeat(np.arange(len(scaled)), np.diff(graph.indptr))
+    weight = 1 - ((y[rows] + y[graph.indices]) / 2) * const.DB_RANGE_WEIGHT
+    graph.data = weight * graph.data**2
+    return graph
+
+def _import_gpu_dbscan():
+    """
+    Import CuPy and the cuML DBSCAN on first use.
+
+    The result is cached, so a missing optional dependency is only looked up once.
+
+    Returns
+    -------
+    tuple or None
+        The cupy module and the cuML DBSCAN class, or None if they are not available.
+    """
+    global _GPU_DBSCAN
+
+    if _GPU_DBSCAN is None:
+        try:
+            import cupy
+            from cuml.cluster import DBSCAN as GpuDBSCAN
+        except ImportError:
+            _GPU_DBSCAN = False
+        else:
+            _GPU_DBSCAN = (cupy, GpuDBSCAN)
+
+    return _GPU_DBSCAN or None
+
+def _fit_predict_dbscan_gpu(pointcloud, eps, min_samples):
+    """
+    Run DBSCAN on the GPU, using cuML.
+
+    Only the (N, 3) point coordinates are copied to the device. The altered Euclidean distances
+    (see calculate_euclidean_dist_matrix) are computed there with CuPy.
+
+    Returns
+    -------
+    np.ndarray or None
+        The cluster labels of the points, or None if CuPy or cuML is not available.
+    """
+    modules = _import_gpu_dbscan()
+    if modules is None:
+        return None
+    cp, GpuDBSCAN = modules
+
+    points = cp.asarray(np.asarray(pointcloud, dtype=np.float32)[:, :3])
+    scaled = points * cp.asarray([1, 1, math.sqrt(const.DB_Z_WEIGHT)], dtype=cp.float32)
+
+    # Summing the squared differences per axis avoids the cancellation of the Gram matrix form in float32
+    dist = cp.zeros((len(points), len(points)), dtype=cp.float32)
+    for axis in range(3):
+        coord = scaled[:, axis]
+        dist += (coord[:, None] - coord[None, :]) ** 2
+
+    y = points[:, 1]
+    dist *= 1 - ((y[:, None] + y[None, :]) / 2) * const.DB_RANGE_WEIGHT
+
+    dbscan = GpuDBSCAN(
+        eps=eps,
+        min_samples=min_samples,
+        metric="precomputed",
+        output_type="numpy",
+    )
+    return np.asarray(dbscan.fit_predict(dist))
+
 def cluster_pointcloud_dbscan(pointcloud, eps=const.DB_EPS, min_samples=const.DB_MIN_SAMPLES_MIN):
     """
     Apply DBSCAN clustering to a 3D point cloud using an altered Euclidean distance metric.
@@ -261,28 +466,57 @@ def cluster_pointcloud_dbscan(pointcloud, eps=const.DB_EPS, min_samples=const.DB
     Returns
     -------
     list
-        A list of clustered point clouds, where each cluster is represented as a list of points.
+        A list of clustered point clouds, where each cluster is represented as an array of points.
     """
-    dbscan = DBSCAN(
-        eps=eps,
-        min_samples=min_samples,
-        metric=calculate_euclidean_dist,
-    )
+    if const.DB_USE_GPU and len(pointcloud) >= const.DB_GPU_MIN_POINTS:
+        labels = _fit_predict_dbscan_gpu(pointcloud, eps, min_samples)
+    else:
+        labels = None
 
-    labels = dbscan.fit_predict(pointcloud)
+    if labels is None:
+        # The distances are computed for all pairs at once, instead of calling the metric per pair.
+        # Above DB_DENSE_MAX_POINTS, only the neighbouring pairs are kept, as the matrix grows with N^2.
+        if len(pointcloud) <= const.DB_DENSE_MAX_POINTS:
+            distances = calculate_euclidean_dist_matrix(pointcloud)
+        else:
+            distances = calculate_euclidean_dist_graph(pointcloud, eps)
+        dbscan = DBSCAN(
+            eps=eps,
+            min_samples=min_samples,
+            metric="precomputed",
+        )
+        labels = dbscan.fit_predict(distances)
 
-    # -1 is the label for noise points
-    filtered_labels = set(labels) - {-1}
+    # Assign points to clusters - sort the points by label and split them at the label changes
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    boundaries = np.flatnonzero(np.diff(sorted_labels)) + 1
+    clusters = np.split(np.asarray(pointcloud)[order], boundaries)
 
-    # Assign points to clusters
-    clustered_points = {label: [] for label in filtered_labels}
-    for i, label in enumerate(labels):
-        if label != -1:
-            clustered_points[label].append(pointcloud[i])
+    # -1 is the label for noise points, which come first after sorting
+    if len(sorted_labels) and sorted_labels[0] == -1:
+        clusters = clusters[1:]
 
-    clusters = list(clustered_points.values())
     return clusters
 
+# Sensor to world axis transformation - rotation by the sensor tilt (about the x axis),
+# followed by the translation to the sensor height. Both are constant, so they are built once.
+_ANG_RAD = math.radians(const.S_TILT)
+_COS = math.cos(_ANG_RAD)
+_SIN = math.sin(_ANG_RAD)
+_R3 = np.array(
+    [
+        [1, 0, 0],
+        [0, _COS, -_SIN],
+        [0, _SIN, _COS],
+    ],
+    dtype=const.PC_DTYPE,
+)
+_T3 = np.array([0, 0, const.S_HEIGHT], dtype=const.PC_DTYPE)
+# Rotation of a (x, y, z, x', y', z') row at once - velocities are directions, so they are only rotated
+_R6 = np.kron(np.eye(2, dtype=const.PC_DTYPE), _R3)
+_T6 = np.concatenate((_T3, np.zeros(3, dtype=const.PC_DTYPE)))
+
 def transform_point_sensor_to_world_axis(input):
     """
     Transform 3D point coordinates and velocities in sensor axis to a standard axis.
@@ -294,41 +528,14 @@ def transform_point_sensor_to_world_axis(input):
     input : array-like
         Input point represented as a 6-element array or list, where the first three elements are coordinates (x, y, z),
         and the last three elements are velocities along the corresponding axes.
+        An (N, 6) array of points is transformed row by row.
 
     Returns
     -------
     np.array
         Transformed point with coordinates and velocities in the standard axis system.
     """
-    # Translation Matrix (T)
-    T = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, const.S_HEIGHT], [0, 0, 0, 1]])
-
-    # Rotation Matrix (R_inv)
-    ang_rad = np.radians(const.S_TILT)
-    R_inv = np.array(
-        [
-            [1, 0, 0, 0],
-            [0, np.cos(ang_rad), -np.sin(ang_rad), 0],
-            [0, np.sin(ang_rad), np.cos(ang_rad), 0],
-            [0, 0, 0, 1],
-        ]
-    )
-
-    coordinates = np.concatenate((input[:3], [1]))
-    velocities = np.concatenate((input[3:], [0]))
-    transformed_coords = np.dot(T, np.dot(R_inv, coordinates))
-    transformed_velocities = np.dot(T, np.dot(R_inv, velocities))
-
-    return np.array(
-        [
-            transformed_coords[0],
-            transformed_coords[1],
-            transformed_coords[2],
-            transformed_velocities[0],
-            transformed_velocities[1],
-            transformed_velocities[2],
-        ]
-    )
+    return np.asarray(input) @ _R6.T + _T6
 
 def normalize_data(detObj):
     """
@@ -339,13 +546,14 @@ def normalize_data(detObj):
 
     Parameters
     ----------
-    detObj : dict
+    detObj : dict or np.ndarray
         Dictionary containing the raw detection data with keys:
         - "x": x-coordinate
         - "y": y-coordinate
         - "z": z-coordinate
         - "doppler": Doppler velocity
         - "peakVal": Signal Intensity
+        or the same data already stacked as an (N, 5) array with the columns in that order.
 
     Returns
     -------
@@ -362,64 +570,40 @@ def normalize_data(detObj):
         - peakval
     """
 
-    input_data = np.vstack(
-        (detObj["x"], detObj["y"], detObj["z"], detObj["doppler"], detObj["peakVal"])
-    ).T
-    ef_data = np.empty((0, 8), dtype="float")
+    if isinstance(detObj, np.ndarray):
+        input_data = detObj.astype(const.PC_DTYPE, copy=False)
+    else:
+        input_data = np.vstack(
+            (detObj["x"], detObj["y"], detObj["z"], detObj["doppler"], detObj["peakVal"])
+        ).T.astype(const.PC_DTYPE, copy=False)
+
+    # Perform scene constraints filtering first, so that only the kept points are transformed.
+    # The constraints only need the world y and z coordinates, which do not depend on x.
+    world_yz = input_data[:, 1:3] @ _R3[1:, 1:].T + _T3[1:]
+    mask = (
+        (world_yz[:, 1] <= const.TR_Z_THRESH)
+        & (world_yz[:, 1] > 0)
+        & (world_yz[:, 0] > 0)
+    )
+    input_data = input_data[mask]
 
-    for index in range(len(input_data)):
+    coords = input_data[:, :3]
+    doppler = input_data[:, 3]
 
-        # Transform the radial velocity into Cartesian
-        r = math.sqrt(
-            input_data[index, 0] ** 2
-            + input_data[index, 1] ** 2
-            + input_data[index, 2] ** 2
-        )
-        if r == 0:
-            vx = 0
-            vy = input_data[index, 3]
-            vz = 0
-        else:
-            if (
-                input_data[index, 0] is None
-                or input_data[index, 1] is None
-                or input_data[index, 2] is None
-                or input_data[index, 3] is None
-            ):
-                print(f"Error: {input_data[index, :]}")
-
-            vx = input_data[index, 3] * input_data[index, 0] / r
-            vy = input_data[index, 3] * input_data[index, 1] / r
-            vz = input_data[index, 3] * input_data[index, 2] / r
-
-        # Translate points to new coordinate system
-        transformed_point = transform_point_sensor_to_world_axis(
-            np.array(
-                [
-                    input_data[index, 0],
-                    input_data[index, 1],
-                    input_data[index, 2],
-                    vx,
-                    vy,
-                    vz,
-                ]
-            )
-        )
+    # The sensor frame (x, y, z, x', y', z') is assembled in place in the output array
+    ef_data = np.empty((len(input_data), 8), dtype=const.PC_DTYPE)
+    ef_data[:, :3] = coords
+    ef_data[:, 6:] = input_data[:, 3:5]
 
-        transformed_point = np.append(
-            transformed_point, (input_data[index, 3], input_data[index, 4])
-        )
+    # Transform the radial velocity into Cartesian
+    # Points at the origin have no direction, so their radial velocity is kept along the y axis.
+    r = np.sqrt(np.einsum("ij,ij->i", coords, coords))
+    at_origin = r == 0
+    scale = np.divide(doppler, r, out=np.zeros_like(r), where=~at_origin)
+    np.multiply(coords, scale[:, None], out=ef_data[:, 3:6])
+    ef_data[at_origin, 4] = doppler[at_origin]
+
+    # Translate points to new coordinate system
+    ef_data[:, :6] = transform_point_sensor_to_world_axis(ef_data[:, :6])
 
-        # Perform scene constraints filtering
-        if (
-            transformed_point[2] <= const.TR_Z_THRESH
-            and transformed_point[2] > 0
-            and transformed_point[1] > 0
-        ):
-            ef_data = np.append(
-                ef_data,
-                [transformed_point],
-                axis=0,
-            )
-
-    return ef_data
\ No newline at end of file
+    return ef_data
@@ -1,5 +1,4 @@
-import collections
-from numpy import average, dot
+import numpy as np
 from Tracking import Status, TrackBuffer
 
 from games.breakout.breakout import Breakout
@@ -10,38 +9,54 @@ import games.breakout.constants as game_const
 
 class GameAdapter(Adapter):
     def __init__(self) -> None:
-        self.current_player_pos = 0
+        self.current_player_pos = 0.0
         self.breakout = Breakout()
         self.breakout.start()
 
+        # Moving average of the player position over a ring buffer of the last positions
         l = const.MOVING_AVERAGE_WINDOW if const.MOVING_AVERAGE else 1
-        self.x = collections.deque(maxlen=l)
+        self.x = np.zeros(l)
+        self._x_idx = 0
+        self._x_count = 0
+        self._x_sum = 0.0
+
+        # Conversion factor of a player displacement in meters to pixels on the game screen
+        self._m_to_px = game_const.SCREEN_WIDTH / const.PLAYGROUND_WIDTH
+        # Sub-pixel part of the paddle displacement, carried over to the next frames
+        self._residual = 0.0
 
     def update(self, trackbuffer: TrackBuffer, **kwargs):
         if trackbuffer.effective_tracks:
             track = trackbuffer.effective_tracks[0]
             if track:
-                self.x.append(track.state.x[0])
+                # The position is copied out as a scalar, as the track state is updated in place.
+                pos = float(track.state.x[0, 0])
+                self._x_sum += pos - self.x[self._x_idx]
+                self.x[self._x_idx] = pos
+                self._x_idx = (self._x_idx + 1) % len(self.x)
+                self._x_count = min(self._x_count + 1, len(self.x))
 
-                new_player_pos = average(self.x)
+                new_player_pos = self._x_sum / self._x_count
 
                 displacement_meters = new_player_pos - self.current_player_pos
 
                 # In case the player is moving, but we are inbetween frames, we need to interpolate.
                 if const.INTERPOLATION and displacement_meters == 0 and track.track_status == Status.DYNAMIC:
                     # Interpolate based on predicted position.
-                    x = track.state.x
-                    F = const.MOTION_MODEL.KF_F(trackbuffer.dt / const.REFRESH_RATE_COEF)
-                    new_player_pos = dot(F, x)
-                    new_player_pos = new_player_pos[0]
+                    # The model matrices are cached per (quantized) dt, and only the x row is needed.
+                    x = track.state.x[:, 0]
+                    F = const.MOTION_MODEL.KF_F(round(trackbuffer.dt / const.REFRESH_RATE_COEF, 4))
+                    new_player_pos = float(F[0] @ x)
 
                     displacement_meters = new_player_pos - self.current_player_pos
 
-                displacement_ratio = displacement_meters / const.PLAYGROUND_WIDTH
-
-                displacement_pixels = displacement_ratio * game_const.SCREEN_WIDTH
+                # The paddle moves in whole pixels, so keep the remainder instead of dropping it
+                displacement_pixels = displacement_meters * self._m_to_px + self._residual
+                int_pixels = int(displacement_pixels)
+                self._residual = displacement_pixels - int_pixels
 
-                self.breakout.move(displacement_pixels)
+                # The game still has to advance (and the ball to move) when the paddle does not
+                self.breakout.move(int_pixels)
                 
                 self.current_player_pos = new_player_pos
             else:
@@ -1,3 +1,4 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
@@ -8,6 +9,34 @@ import constants as const
 from Tracking import TrackBuffer
 from adapters.adapter import Adapter
 
+# Vertices of a bounding box centered at the origin (on the ground)
+_BBOX_VERTS = np.array(
+    [
+        [-0.3, -0.3, 0],
+        [0.3, -0.3, 0],
+        [0.3, 0.3, 0],
+        [-0.3, 0.3, 0],
+        [-0.3, -0.3, 2.5],
+        [0.3, -0.3, 2.5],
+        [0.3, 0.3, 2.5],
+        [-0.3, 0.3, 2.5],
+    ]
+)
+# Vertex indices of the bounding box faces
+_BBOX_FACE_IDX = np.array(
+    [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [0, 3, 7, 4],
+        [1, 2, 6, 5],
+        [0, 1, 5, 4],
+        [2, 3, 7, 6],
+    ]
+)
+# Faces of the bounding box centered at the origin - (6, 4, 3)
+_BBOX_FACES = _BBOX_VERTS[_BBOX_FACE_IDX]
+
+
 class PlotAdapter(Adapter):
     def setup_subplot(self, subplot: Axes3D):
         axis_dim = const.V_3D_AXIS
@@ -22,9 +51,10 @@ class PlotAdapter(Adapter):
         return subplot.scatter([], [], [])
 
     def __init__(self, raw_cloud=True, b_boxes=True):
-        self.dynamic_art = []
-        self.arrows = []
-        fig = plt.figure()
+        self.arrows = None
+        self.fig = fig = plt.figure()
+        # Earliest time (time.monotonic) at which the next frame is rendered
+        self._next_render = 0.0
         plots_num = sum([raw_cloud, b_boxes])
         plots_index = 1
 
@@ -37,8 +67,12 @@ class PlotAdapter(Adapter):
         if b_boxes:
             # Create subplot of tracks and predictions
             self.ax_bb = fig.add_subplot(1, plots_num, plots_index, projection="3d")
-            self.setup_subplot(self.ax_bb)
-            self.bb_scatter = None
+            # The scatter and the bounding boxes are reused across frames and only get new data
+            self.bb_scatter = self.setup_subplot(self.ax_bb)
+            self.bb_cubes = Poly3DCollection([], alpha=0.2)
+            # Track colors the bounding boxes were last colored with
+            self._bb_colors = np.empty((0, 3))
+            self.ax_bb.add_collection3d(self.bb_cubes)
             self.ax_bb.set_title("Target Tracking")
             plots_index += 1
 
@@ -53,123 +87,92 @@ class PlotAdapter(Adapter):
             if detObj is None:
                 return
 
+            # Matplotlib has to stay on the GUI (calling) thread, so instead of blocking the tracking
+            # loop on every redraw, drop frames for as long as the previous render took.
+            t0 = time.monotonic()
+            if t0 < self._next_render:
+                return
+
             self.clear()
             self.update_raw(detObj["x"], detObj["y"], detObj["z"])
             self.update_bb(trackbuffer)
             self.draw()
 
+            t1 = time.monotonic()
+            self._next_render = t1 + (t1 - t0)
+
     def clear(self):
         if not hasattr(self, "ax_bb"):
             return
 
-        # Remove pointcloud
-        if self.bb_scatter is not None:
-            self.bb_scatter.remove()
-
-        # Remove bounding boxes
-        for collection in self.dynamic_art:
-            collection.remove()
-        self.dynamic_art = []
-
-        # Remove arrows
-        for arrow in self.arrows:
-            arrow.remove()
-        self.arrows = []
-
-        # Remove screen fading
-        for patch in self.ax_bb.patches:
-            patch.remove()
+        # Remove arrows (the pointcloud and bounding boxes are updated in place)
+        if self.arrows is not None:
+            self.arrows.remove()
+            self.arrows = None
 
     def update_raw(self, x, y, z):
         if not hasattr(self, "ax_raw"):
             return
 
-        # Update the data in the 3D scatter plot
+        # Update the data in the 3D scatter plot (redrawn together with the rest of the figure in draw)
         self.raw_scatter._offsets3d = (x, y, z)
-        plt.draw()
-
-    def _draw_bounding_box(self, x, color="gray", fill=0):
-        # Create Bounding Boxes
-        c = np.array(
-            [
-                x[0],
-                x[1],
-                x[2] * 0.0,
-            ]
-        ).flatten()
-        vertices = np.array(
-            [
-                [-0.3, -0.3, 0],
-                [0.3, -0.3, 0],
-                [0.3, 0.3, 0],
-                [-0.3, 0.3, 0],
-                [-0.3, -0.3, 2.5],
-                [0.3, -0.3, 2.5],
-                [0.3, 0.3, 2.5],
-                [-0.3, 0.3, 2.5],
-            ]
-        )
-        vertices = vertices + c
+
+    def _update_bounding_boxes(self, positions, colors):
+        # Move the Bounding Boxes, standing on the ground at the (x, y) positions of the states
+        c = np.zeros((len(positions), 1, 1, 3))
+        c[:, 0, 0, :2] = positions
         # vertices = vertices * (const.V_BBOX_HEIGHT / 6) + c
-        # Define the cube faces
-        faces = [
-            [vertices[j] for j in [0, 1, 2, 3]],
-            [vertices[j] for j in [4, 5, 6, 7]],
-            [vertices[j] for j in [0, 3, 7, 4]],
-            [vertices[j] for j in [1, 2, 6, 5]],
-            [vertices[j] for j in [0, 1, 5, 4]],
-            [vertices[j] for j in [2, 3, 7, 6]],
-        ]
-
-        cube = Poly3DCollection(faces, color=[color], alpha=fill)
-        self.ax_bb.add_collection3d(cube)
-        return cube
+        # Shift the face template to all boxes at once - (T * 6, 4, 3)
+        faces = (_BBOX_FACES + c).reshape(-1, 4, 3)
+
+        # All boxes share a single collection, with the color of each box repeated for its faces
+        self.bb_cubes.set_verts(faces)
+
+        # Tracks keep their colors, so the face colors are only converted again when they change
+        if not np.array_equal(colors, self._bb_colors):
+            face_colors = np.repeat(colors, len(_BBOX_FACE_IDX), axis=0)
+            self.bb_cubes.set_facecolor(face_colors)
+            self.bb_cubes.set_edgecolor(face_colors)
+            self._bb_colors = colors
 
     def update_bb(self, trackbuffer: TrackBuffer):
         if not hasattr(self, "ax_bb"):
             return
 
-        x_all = np.array([])  # Initialize as empty NumPy arrays
-        y_all = np.array([])
-        z_all = np.array([])
-        color_all = np.array([]).reshape(0, 3)
+        tracks = trackbuffer.effective_tracks
+        # Copy the points of all tracks straight into a single preallocated array
+        total = sum(len(track.batch.effective_data) for track in tracks)
+        points = np.empty((total, 3))
+        color_all = np.empty((total, 3))
+        colors = np.empty((len(tracks), 3))
+        states = np.empty((len(tracks), 6))
 
-        for track in trackbuffer.effective_tracks:
+        start = 0
+        for k, track in enumerate(tracks):
             # We want to visualize only new points.
             # if track.lifetime == 0:
             coords = track.batch.effective_data
-            x, y, z = coords[:, 0], coords[:, 1], coords[:, 2]
+            end = start + len(coords)
+            points[start:end] = coords[:, :3]
+            # Different colors for different clusters
+            color_all[start:end] = track.color
+            start = end
 
-            # Update pointclouds with different colors for different clusters
-            x_all = np.concatenate([x_all, x])
-            y_all = np.concatenate([y_all, y])
-            z_all = np.concatenate([z_all, z])
-            color_all = np.concatenate(
-                [color_all, np.repeat([track.color], len(x), axis=0)]
-            )
+            colors[k] = track.color
+            states[k] = track.state.x[:6, 0]
 
-            self.dynamic_art.append(
-                self._draw_bounding_box(track.state.x, color=track.color, fill=0.2)
-            )
+        self._update_bounding_boxes(states[:, :2], colors)
 
-            # Draw an arrow in the velocity direction
+        if tracks:
+            # Draw arrows in the velocity directions of all tracks at once
             # Calculated using the track.state.x[3:6] values
-            self.arrows.append(self.ax_bb.quiver(
-                track.state.x[0],
-                track.state.x[1],
-                track.state.x[2],
-                track.state.x[3],
-                track.state.x[4],
-                track.state.x[5],
-                color=track.color,
-            ))
-
+            self.arrows = self.ax_bb.quiver(*states.T, color=colors)
 
         # Update 3d plot
-        self.bb_scatter = self.ax_bb.scatter(
-            x_all, y_all, z_all, c=color_all, marker="o"
-        )
+        self.bb_scatter._offsets3d = (points[:, 0], points[:, 1], points[:, 2])
+        self.bb_scatter.set_color(color_all)
 
     def draw(self):
-        plt.draw()
-        plt.pause(0.1)  # Pause for a short time to allow for updating
\ No newline at end of file
+        # Schedule a single redraw of the figure and let the GUI process it, without blocking
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
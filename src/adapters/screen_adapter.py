@@ -1,12 +1,14 @@
+import numpy as np
 import pyqtgraph as pg
 from PyQt5.QtWidgets import QApplication
+from typing import List
 
 import constants as const
 
 from Tracking import TrackBuffer, ClusterTrack
 from adapters.adapter import Adapter
 
-from Utils import calc_projection_points
+from Utils import calc_projection_points_batch
 
 
 class ScreenAdapter(Adapter):
@@ -29,33 +31,39 @@ class ScreenAdapter(Adapter):
 
         self.PIX_TO_M = 3779 * const.V_SCALLING
 
+        # Fading square size limits
+        self._fade_max = const.V_SCREEN_FADE_SIZE_MAX
+        self._fade_min = const.V_SCREEN_FADE_SIZE_MIN
+        self._fade_w = const.V_SCREEN_FADE_WEIGHT
+
     def update(self, trackbuffer: TrackBuffer, **kwargs):
-        # Clear previous items in the view
-        self.scatter.clear()
-        for track in trackbuffer.effective_tracks:
-            center, rect_size = self._calc_fade_square(track)
-
-            self.scatter.addPoints(
-                x=center[0] - rect_size / 2,
-                y=center[1] - rect_size / 2,
-                size=rect_size * self.PIX_TO_M,
+        if trackbuffer.effective_tracks:
+            centers, rect_sizes = self._calc_fade_squares(trackbuffer.effective_tracks)
+
+            # Replace the previous squares with the new ones in a single call
+            self.scatter.setData(
+                x=centers[0] - rect_sizes / 2,
+                y=centers[1] - rect_sizes / 2,
+                size=rect_sizes * self.PIX_TO_M,
             )
+        else:
+            # Clear previous items in the view
+            self.scatter.clear()
 
         # Update the view
         QApplication.processEvents()
 
-    def _calc_fade_square(self, track: ClusterTrack):
-        center = calc_projection_points(
-            track.state.x[0] + track.keypoints[11],
-            track.state.x[1] + track.keypoints[12],
-            track.keypoints[13],
-        )
-        rect_size = max(
-            const.V_SCREEN_FADE_SIZE_MIN,
-            min(
-                const.V_SCREEN_FADE_SIZE_MAX,
-                const.V_SCREEN_FADE_SIZE_MAX
-                - (track.state.x[1] + track.keypoints[12]) * const.V_SCREEN_FADE_WEIGHT,
-            ),
-        )
-        return (center, rect_size)
+    def _calc_fade_squares(self, tracks: List[ClusterTrack]):
+        # Projection reference points of all tracks
+        points = np.empty((len(tracks), 3))
+        for k, track in enumerate(tracks):
+            state_x = track.state.x
+            keypoints = track.keypoints
+            points[k, 0] = state_x[0, 0] + keypoints[11]
+            points[k, 1] = state_x[1, 0] + keypoints[12]
+            points[k, 2] = keypoints[13]
+        x, y, z = points.T
+
+        centers = calc_projection_points_batch(x, y, z)
+        rect_sizes = np.clip(self._fade_max - y * self._fade_w, self._fade_min, self._fade_max)
+        return (centers, rect_sizes)
@@ -1,4 +1,5 @@
 import numpy as np
+from functools import lru_cache
 from filterpy.common import Q_discrete_white_noise
 from scipy.linalg import block_diag
 
@@ -62,6 +63,8 @@ V_BBOX_HEIGHT = 1.8
 V_BBOX_EYESIGHT_HEIGHT = 1.75
 
 ###### Frames and Buffering #######
+# Precision of the preprocessed pointcloud data
+PC_DTYPE = np.float32
 FB_FRAMES_SKIP = 0
 FB_EXPERIMENT_FILE_SIZE = 200
 FB_WRITE_BUFFER_SIZE = 40  # NOTE: must divide FB_EXPERIMENT_FILE_SIZE
@@ -79,6 +82,11 @@ DB_Z_WEIGHT = 0.4
 DB_RANGE_WEIGHT = 0.03
 DB_EPS = 0.3
 DB_MIN_SAMPLES_MIN = 40
+# Batches of more points are clustered on a sparse neighbourhood graph instead of the full distance matrix
+DB_DENSE_MAX_POINTS = 2000
+# Run DBSCAN with cuML on the GPU (if installed) for batches of at least DB_GPU_MIN_POINTS points
+DB_USE_GPU = False
+DB_GPU_MIN_POINTS = 2000
 
 # Inner DBScan
 DB_POINTS_THRES = 40
@@ -101,6 +109,11 @@ MIN_VELOCITY_STOP_NO_POINTS = 0.04
 MIN_VELOCITY_STOP_NO_DYNAMIC_POINTS = 0.04
 MIN_VELOCITY_SLOW_DOWN = 1
 
+# Squared thresholds, compared directly against the squared track velocity
+MIN_VELOCITY_STOP_NO_POINTS_SQ = MIN_VELOCITY_STOP_NO_POINTS**2
+MIN_VELOCITY_STOP_NO_DYNAMIC_POINTS_SQ = MIN_VELOCITY_STOP_NO_DYNAMIC_POINTS**2
+MIN_VELOCITY_SLOW_DOWN_SQ = MIN_VELOCITY_SLOW_DOWN**2
+
 # Dynamic Points Doppler Threshold
 DOPPLER_THRESHOLD = 0
 
@@ -123,6 +136,12 @@ KF_SPREAD_LIM = [0.2, 0.2, 2, 1.2, 1.2, 0.2] # Spread limitation in a single dir
 KF_A_SPR = 0.9
 
 ############### Model ####################
+def _read_only(matrix):
+    # The model matrices are cached and shared between all tracks, so they must not be modified in place.
+    matrix.setflags(write=False)
+    return matrix
+
+
 # Motion Models
 class CONST_ACC_MODEL:
     KF_DIM = [9, 6]
@@ -143,8 +162,9 @@ class CONST_ACC_MODEL:
         return [init[0], init[1], init[2], init[3], init[4], init[5], 0, 0, 0]
 
     # State Transition Matrix
+    @lru_cache(maxsize=64)
     def KF_F(dt):
-        return np.array(
+        F = np.array(
             [
                 [1, 0, 0, dt, 0, 0, (0.5 * dt**2), 0, 0],
                 [0, 1, 0, 0, dt, 0, 0, (0.5 * dt**2), 0],
@@ -157,13 +177,16 @@ class CONST_ACC_MODEL:
                 [0, 0, 0, 0, 0, 0, 0, 0, 1],
             ]
         )
+        return _read_only(F)
 
+    @lru_cache(maxsize=64)
     def KF_Q_DISCR(dt):
-        return block_diag(
+        Q = block_diag(
             Q_discrete_white_noise(dim=3, dt=dt, var=KF_Q_STD),
             Q_discrete_white_noise(dim=3, dt=dt, var=KF_Q_STD),
             Q_discrete_white_noise(dim=3, dt=dt, var=KF_Q_STD),
         )
+        return _read_only(Q)
 
 
 class CONST_VEL_MODEL:
@@ -175,8 +198,9 @@ class CONST_VEL_MODEL:
         return [init[0], init[1], init[2], init[3], init[4], init[5]]
 
     # State Transition Matrix
+    @lru_cache(maxsize=64)
     def KF_F(dt):
-        return np.array(
+        F = np.array(
             [
                 [1, 0, 0, dt, 0, 0],
                 [0, 1, 0, 0, dt, 0],
@@ -186,12 +210,15 @@ class CONST_VEL_MODEL:
                 [0, 0, 0, 0, 0, 1],
             ]
         )
+        return _read_only(F)
 
+    @lru_cache(maxsize=64)
     def KF_Q_DISCR(dt):
-        return block_diag(
+        Q = block_diag(
             Q_discrete_white_noise(dim=3, dt=dt, var=KF_Q_STD),
             Q_discrete_white_noise(dim=3, dt=dt, var=KF_Q_STD),
         )
+        return _read_only(Q)
 
 
 MOTION_MODEL = CONST_ACC_MODEL
@@ -39,9 +39,11 @@ class Ball():
     """
     def __init__(self, screen, x, y, speed_max = 5):
         self.screen = screen
-        self.ball_rad = int(0.5 * const.SCREEN_HEIGHT / const.ROW_NUM * const.BALL_SIZE_COEF)
+        self.ball_rad = const.BALL_RADIUS
         self.speed_max = speed_max
 
+        # the rectangle is created once and moved in place on reset
+        self.rect = Rect(0, 0, self.ball_rad * 2, self.ball_rad * 2)
         self.reset(x, y)
 
     def move(self, wall, player_paddle):
@@ -50,35 +52,27 @@ class Ball():
         collision_thresh_x = self.speed_max
         collision_thresh_y = abs(self.speed_y)
 
-        wall_destroyed = 1
-        
-        for row_idx, row in enumerate(wall.blocks):
-            for col_ixd, item in enumerate(row):
-                # check whether the ball collides with a block
-                if self.rect.colliderect(item[0]):
-                    # object above
-                    if abs(self.rect.bottom - item[0].top) < collision_thresh_y and self.speed_y > 0:
-                        self.speed_y *= -1
-                    # object below
-                    elif abs(self.rect.top - item[0].bottom) < collision_thresh_y and self.speed_y < 0:
-                        self.speed_y *= -1
-                    # object on the right
-                    elif abs(self.rect.right - item[0].left) < collision_thresh_x and self.speed_x > 0:
-                        self.speed_x *= -1
-                    # object on the left
-                    elif abs(self.rect.left - item[0].right) < collision_thresh_x and self.speed_x < 0:
-                        self.speed_x *= -1
-
-                    if wall.blocks[row_idx][col_ixd][1] > 1:
-                        wall.blocks[row_idx][col_ixd][1] -= 1
-                    else:
-                        wall.blocks[row_idx][col_ixd][0] = (0, 0, 0, 0)
-
-                # if a block still exists, the wall is not destroyed
-                if wall.blocks[row_idx][col_ixd][0] != (0, 0, 0, 0):
-                    wall_destroyed = 0
-
-        if wall_destroyed == 1:
+        # check which blocks the ball collides with, all at once
+        for idx in self.rect.collidelistall(wall.flat_rects):
+            item = wall.flat_blocks[idx]
+            block_rect = item[0]
+            # object above
+            if abs(self.rect.bottom - block_rect.top) < collision_thresh_y and self.speed_y > 0:
+                self.speed_y *= -1
+            # object below
+            elif abs(self.rect.top - block_rect.bottom) < collision_thresh_y and self.speed_y < 0:
+                self.speed_y *= -1
+            # object on the right
+            elif abs(self.rect.right - block_rect.left) < collision_thresh_x and self.speed_x > 0:
+                self.speed_x *= -1
+            # object on the left
+            elif abs(self.rect.left - block_rect.right) < collision_thresh_x and self.speed_x < 0:
+                self.speed_x *= -1
+
+            wall.hit_block(idx)
+
+        # the wall is destroyed once no blocks are left
+        if wall.blocks_left == 0:
             self.game_over = 1
 
         if self.rect.left < 0 or self.rect.right > const.SCREEN_WIDTH:
@@ -122,4 +116,4 @@ class Ball():
 
         self.game_over = 0
         
-        self.rect = Rect(self.x, self.y, self.ball_rad * 2, self.ball_rad * 2)
\ No newline at end of file
+        self.rect.update(self.x, self.y, self.ball_rad * 2, self.ball_rad * 2)
\ No newline at end of file
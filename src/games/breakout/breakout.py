@@ -27,6 +27,11 @@ class Breakout:
 
         self.ball = Ball(self.screen, self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y)
 
+        # Screen areas of the paddle and the ball as last drawn, and whether the next frame has to redraw the whole screen
+        self.paddle_drawn = None
+        self.ball_drawn = None
+        self.full_redraw = True
+
     def _draw_text(self, text, font, color_text, x, y):
         img = font.render(text, True, color_text)
         self.screen.blit(img, (x, y))
@@ -46,17 +51,34 @@ class Breakout:
         self.ball.reset(self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y - self.player_paddle.height)
         self.player_paddle.reset()
         self.wall.initialise_wall()
+        self.full_redraw = True
 
         pygame.display.update()
 
-    def move(self, paddle_displacement):
-        self.clock.tick(const.FPS)
+    def _restore_background(self, rects):
+        # Repaint the background and the wall blocks underneath the given screen areas
+        for rect in rects:
+            self.screen.fill(const.COLOR_BACKGROUND, rect)
+            self.screen.blit(self.wall.wall_surface, rect, rect)
 
-        self.screen.fill(const.COLOR_BACKGROUND)
+    def move(self, paddle_displacement):
+        # No frame limiter here, the caller (the radar loop) sets the pace
+        if self.full_redraw or not self.live_ball:
+            self.screen.fill(const.COLOR_BACKGROUND)
+            self.wall.update_wall()
+            self.wall.dirty_rects.clear()
+            self.full_redraw = False
+            dirty_rects = None
+        else:
+            # Only the areas the paddle and the ball leave, and the blocks hit since the last frame change
+            dirty_rects = [self.paddle_drawn, self.ball_drawn] + self.wall.dirty_rects
+            self.wall.dirty_rects.clear()
+            self._restore_background(dirty_rects)
 
-        self.wall.update_wall()
         self.player_paddle.draw()
         self.ball.draw()
+        self.paddle_drawn = self.player_paddle.rect.copy()
+        self.ball_drawn = self.ball.rect.copy()
 
         if self.live_ball:
             self.player_paddle.move(displacement=paddle_displacement)
@@ -75,17 +97,24 @@ class Breakout:
                 self._draw_text('YOU LOST!', self.font, const.COLOR_TEXT, 240, const.SCREEN_HEIGHT // 2 + 50)
                 self._draw_text('CLICK ANYWHERE TO START', self.font, const.COLOR_TEXT, 100, const.SCREEN_HEIGHT // 2 + 100)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-            if event.type == pygame.MOUSEBUTTONDOWN and self.live_ball == False:
-                self.live_ball = True
-                self.ball.reset(self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y - self.player_paddle.height)
-                self.player_paddle.reset()
-                self.wall.initialise_wall()
-
-        pygame.display.update()
+        # Pump the SDL event queue once per frame, then only fetch the events we react to
+        # and drop the rest (e.g. mouse motion) in one call
+        pygame.event.pump()
+        if pygame.event.get(pygame.QUIT, pump=False):
+            pygame.quit()
+            return
+        if pygame.event.get(pygame.MOUSEBUTTONDOWN, pump=False) and self.live_ball == False:
+            self.live_ball = True
+            self.ball.reset(self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y - self.player_paddle.height)
+            self.player_paddle.reset()
+            self.wall.initialise_wall()
+            self.full_redraw = True
+        pygame.event.clear(pump=False)
+
+        if dirty_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty_rects + [self.paddle_drawn, self.ball_drawn])
 
     def run(self):
         run = True
@@ -100,7 +129,7 @@ class Breakout:
 
             if self.live_ball:
                 # draw paddle
-                self.player_paddle.move()
+                self.player_paddle.move_from_keys()
                 # draw ball
                 self.game_over = self.ball.move(self.wall, self.player_paddle)
                 if self.game_over != 0:
@@ -117,14 +146,15 @@ class Breakout:
                     self._draw_text('YOU LOST!', self.font, const.COLOR_TEXT, 240, const.SCREEN_HEIGHT // 2 + 50)
                     self._draw_text('CLICK ANYWHERE TO START', self.font, const.COLOR_TEXT, 100, const.SCREEN_HEIGHT // 2 + 100)
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    run = False
-                if event.type == pygame.MOUSEBUTTONDOWN and self.live_ball == False:
-                    self.live_ball = True
-                    self.ball.reset(self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y - self.player_paddle.height)
-                    self.player_paddle.reset()
-                    self.wall.initialise_wall()
+            pygame.event.pump()
+            if pygame.event.get(pygame.QUIT, pump=False):
+                run = False
+            if pygame.event.get(pygame.MOUSEBUTTONDOWN, pump=False) and self.live_ball == False:
+                self.live_ball = True
+                self.ball.reset(self.player_paddle.x + (self.player_paddle.width // 2), self.player_paddle.y - self.player_paddle.height)
+                self.player_paddle.reset()
+                self.wall.initialise_wall()
+            pygame.event.clear(pump=False)
 
             pygame.display.update()
 
@@ -1,3 +1,5 @@
+from typing import Final
+
 ##### Screen #####
 SCREEN_WIDTH = 600
 SCREEN_HEIGHT = 600
@@ -34,4 +36,17 @@ FPS = 60
 BALL_SIZE_COEF = 0.25
 
 # Speed
-BALL_SPEED_INITIAL_COEF = 0.8
\ No newline at end of file
+BALL_SPEED_INITIAL_COEF = 0.8
+
+##### Derived Sizes #####
+# Computed once here, so that the game objects read them directly
+
+# Blocks fill the entire screen horizontally and only half of the screen vertically
+BLOCK_WIDTH: Final[int] = (SCREEN_WIDTH - 3) // COL_NUM
+BLOCK_HEIGHT: Final[int] = int(-3 + 0.5 * SCREEN_HEIGHT // ROW_NUM)
+
+# The paddle is as wide as a block
+PADDLE_WIDTH: Final[int] = int(SCREEN_WIDTH / COL_NUM * PADDLE_WIDTH_COEF)
+PADDLE_HEIGHT: Final[int] = int(0.5 * SCREEN_HEIGHT / ROW_NUM * PADDLE_HEIGHT_COEF)
+
+BALL_RADIUS: Final[int] = int(0.5 * SCREEN_HEIGHT / ROW_NUM * BALL_SIZE_COEF)
@@ -17,36 +17,51 @@ class Paddle():
         The height of the paddle.
     speed : int
         The speed at which the paddle moves.
+    max_x : int
+        The maximum x-coordinate of the paddle, so that it stays within the screen.
     x : int
         The x-coordinate of the paddle.
     y : int
         The y-coordinate of the paddle.
     direction : int
         The direction in which the paddle is moving (-1 for left, 1 for right, 0 for no movement)
+    alpha_surf : Surface
+        The pre-rendered translucent paddle, blitted on the screen at the paddle position.
 
     Methods
     -------
+    move_from_keys()
+        Moves the paddle based on the pressed arrow keys.
     move(displacement)
-        Moves the paddle based on the player's input.
+        Moves the paddle based on the player's movement (displacement in pixels).
     set_x(x)
         Sets the x-coordinate of the paddle.
     draw()
         Draws the paddle on the screen.
-    draw_rect_alpha()
-        Draws a rectangle with a transparent fill color.
     reset()
         Resets the paddle to its initial position. Centered at the bottom of the screen.
     """
+    __slots__ = ('screen', 'width', 'height', 'speed', 'max_x', 'alpha_surf', 'x', 'y', 'direction', 'rect')
+
     def __init__(self, screen):
         self.screen = screen
-        self.width = int(const.SCREEN_WIDTH / const.COL_NUM * const.PADDLE_WIDTH_COEF) # the paddle is as wide as a block
-        self.height = int(0.5 * const.SCREEN_HEIGHT / const.ROW_NUM * const.PADDLE_HEIGHT_COEF)
+        self.width = const.PADDLE_WIDTH
+        self.height = const.PADDLE_HEIGHT
         
         self.speed = const.PADDLE_SPEED
-        
+        # the rightmost x-coordinate the paddle can move to
+        self.max_x = const.SCREEN_WIDTH - self.width
+
+        # the paddle size and color never change, so it is rendered only once
+        # (in the pixel format of the display, which is set up before the paddle)
+        self.alpha_surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.rect(self.alpha_surf, const.PADDLE_COLOR_FILL, self.alpha_surf.get_rect())
+
+        # the rectangle is created once and moved in place on reset
+        self.rect = Rect(0, 0, self.width, self.height)
         self.reset()
 
-    def move(self):
+    def move_from_keys(self):
         self.direction = 0
         key = pygame.key.get_pressed()
         if key[pygame.K_LEFT] and self.rect.left > 0:
@@ -57,25 +72,22 @@ class Paddle():
             self.direction = 1
 
     def move(self, displacement):
-        self.direction = 0
-        displacement = -displacement
-        if displacement < 0:
-            displacement = - min(abs(displacement), self.rect.x)
-        else:
-            displacement = min(displacement, const.SCREEN_WIDTH - (self.rect.x + self.width))
-        self.rect.x += displacement
-        self.direction = -1 if displacement < 0 else 1
+        # keep the paddle within the screen
+        x = self.rect.x
+        new_x = x - displacement
+        if new_x < 0:
+            new_x = 0
+        elif new_x > self.max_x:
+            new_x = self.max_x
+        self.rect.x = new_x
+        # a paddle that did not move still reports 1, which Ball.move adds to its x-speed on a hit
+        self.direction = -1 if self.rect.x < x else 1
 
     def set_x(self, x):
         self.rect.x = x
 
     def draw(self):
-        self.draw_rect_alpha(self.screen, const.PADDLE_COLOR_FILL, self.rect)
-
-    def draw_rect_alpha(self, surface, color, rect, width=0):
-        shape_surf = pygame.Surface(pygame.Rect(rect).size, pygame.SRCALPHA)
-        pygame.draw.rect(shape_surf, color, shape_surf.get_rect(), width)
-        surface.blit(shape_surf, rect)
+        self.screen.blit(self.alpha_surf, self.rect)
 
     def reset(self):
         self.x = int((const.SCREEN_WIDTH / 2) - (self.width / 2))
@@ -83,4 +95,4 @@ class Paddle():
         
         self.direction = 0
         
-        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
@@ -17,19 +17,42 @@ class Wall():
     blocks : list
         A two-dimensional list containing the blocks. Each block is represented by a list containing a rectangle and a strength value.
         The strength indicates the number of hits required to destroy that block.
+    flat_blocks : list
+        The same blocks as in blocks, flattened row by row.
+    flat_rects : list
+        The rectangles of flat_blocks (a destroyed block has an empty (0, 0, 0, 0) rectangle), for batch collision checks.
+    blocks_left : int
+        The number of blocks that are not destroyed yet.
+    wall_surface : Surface
+        The pre-rendered blocks, blitted on the screen at once.
+    block_template : Surface
+        A pre-rendered block (fill and outline), blitted at the position of each block.
+    dirty_rects : list
+        The areas of the blocks hit since they were last drawn on the screen.
 
     Methods
     -------
-    create_wall()
-        Creates the block instances and stores them in the blocks list.
-    draw_wall()
-        Draws the blocks on the screen. The block color is determined by each block's strength.
+    initialise_wall()
+        Creates the block instances, stores them in the blocks list and renders them on the wall surface.
+    hit_block(idx)
+        Reduces the strength of a block (by its flat index) and removes it from the wall surface once destroyed.
+    update_wall()
+        Draws the blocks on the screen.
     
     """
+    __slots__ = ('screen', 'width', 'height', 'wall_surface', 'blocks', 'flat_blocks', 'flat_rects', 'blocks_left', 'dirty_rects', 'block_template')
+
     def __init__(self, screen):
         self.screen = screen
-        self.width = (const.SCREEN_WIDTH - 3) // const.COL_NUM # fill the entire screen horizontally
-        self.height = -3 + 0.5 * const.SCREEN_HEIGHT // const.ROW_NUM # fill only half of the screen vertically
+        self.width = const.BLOCK_WIDTH
+        self.height = const.BLOCK_HEIGHT
+        # the blocks only change when hit, so they are rendered once and blitted every frame
+        # (the surfaces are converted to the pixel format of the display, which is set up before the wall)
+        self.wall_surface = pygame.Surface((const.SCREEN_WIDTH, const.SCREEN_HEIGHT // 2), pygame.SRCALPHA).convert_alpha()
+        # all blocks look the same, so a single block is rendered and copied for each of them
+        self.block_template = pygame.Surface((self.width, self.height)).convert()
+        self.block_template.fill(const.COLOR_BLOCK_DELFT_BLUE)
+        pygame.draw.rect(self.block_template, (255,255,255), self.block_template.get_rect(), 3)
 
     def initialise_wall(self):
         self.blocks = []
@@ -48,9 +71,31 @@ class Wall():
                 block_row.append(block_individual)    
             self.blocks.append(block_row)
 
+        # Flat views of the same blocks, kept in sync by the ball when blocks are hit
+        self.flat_blocks = [block for row in self.blocks for block in row]
+        self.flat_rects = [block[0] for block in self.flat_blocks]
+        self.blocks_left = len(self.flat_blocks)
+        self.dirty_rects = []
+
+        self.wall_surface.fill((0, 0, 0, 0))
+        for block in self.flat_blocks:
+            self._draw_block(block)
+
+    def _draw_block(self, block):
+        self.wall_surface.blit(self.block_template, block[0])
+
+    def hit_block(self, idx):
+        block = self.flat_blocks[idx]
+        self.dirty_rects.append(pygame.Rect(block[0]))
+        if block[1] > 1:
+            block[1] -= 1
+            self._draw_block(block)
+        else:
+            # clear the destroyed block from the wall surface
+            self.wall_surface.fill((0, 0, 0, 0), block[0])
+            block[0] = (0, 0, 0, 0)
+            self.flat_rects[idx] = block[0]
+            self.blocks_left -= 1
+
     def update_wall(self):
-        for row in self.blocks:
-            for block in row:
-                block_col = const.COLOR_BLOCK_DELFT_BLUE
-                pygame.draw.rect(self.screen, block_col, block[0])
-                pygame.draw.rect(self.screen, (255,255,255), (block[0]), 3)
+        self.screen.blit(self.wall_surface, (0, 0))
@@ -29,18 +29,20 @@ def main():
     batch = BatchedData()
     visual = VisualManager()
 
+    # Frame period and deadline of the control loop (ns)
+    period = int(SLEEPTIME / 2 * 1e9)
+    deadline = time.monotonic_ns() + period
+
     # Disable screen sleep/screensaver
     with keep.presenting():
         # Control loop
         while True:
             try:
-                t0 = time.time()
-
                 # Online mode
                 dataOk, _, detObj = IWR1443.read()
 
                 if dataOk:
-                    now = time.time()
+                    now = time.perf_counter()
                     trackbuffer.dt = now - trackbuffer.t
                     trackbuffer.t = now
                     # Apply scene constraints, translation
@@ -50,13 +52,18 @@ def main():
                         # TODO: Remove IF as the ELSE would never happen.
                         # Tracking Module
                         trackbuffer.track(effective_data, batch)
-                    visual.update(trackbuffer, detObj)
+                    visual.update(trackbuffer, detObj=detObj)
                 else:
-                    visual.update(trackbuffer)
+                    visual.update(trackbuffer, detObj=None)
 
-                t_code = time.time() - t0
-                t_sleep = max(0, SLEEPTIME / 2 - t_code)
-                time.sleep(t_sleep)
+                # Sleep until the next frame deadline (on the monotonic clock, so that the pace does not drift)
+                now = time.monotonic_ns()
+                if deadline > now:
+                    time.sleep((deadline - now) / 1e9)
+                    deadline += period
+                else:
+                    # Running late, so start the next period from now instead of catching up
+                    deadline = now + period
 
             except KeyboardInterrupt:
                 del IWR1443
@@ -35,11 +35,14 @@ def offline_main():
     batch = BatchedData()
     first_iter = True
 
+    # Frame period and deadline of the control loop (ns)
+    period = int(const.SLEEPTIME / const.REFRESH_RATE_COEF * 1e9)
+    deadline = time.monotonic_ns() + period
+
     # Disable screen sleep/screensaver
     with keep.presenting():
         # Control loop
         while not sensor_data.is_finished():
-            t0 = time.time()
             try:
                 dataOk, _, detObj = sensor_data.get_data()
                 if dataOk:
@@ -51,22 +54,27 @@ def offline_main():
 
                     trackbuffer.t = detObj["posix"][0] / 1000
                     # Apply scene constraints, translation and static clutter removal
-                    effective_data = normalize_data(detObj)
+                    effective_data = normalize_data(detObj["points"])
 
                     if effective_data.shape[0] != 0:
                         # Tracking module
                         trackbuffer.track(effective_data, batch)
 
-                    visual.update(trackbuffer, sensor_data.frame_count, detObj)
+                    visual.update(trackbuffer, detObj=detObj, frame_number=sensor_data.frame_count)
                 else:
-                    visual.update(trackbuffer, sensor_data.frame_count)
+                    visual.update(trackbuffer, detObj=None, frame_number=sensor_data.frame_count)
 
             except KeyboardInterrupt:
                 break
             finally:
-                t_code = time.time() - t0
-                t_sleep = max(0, const.SLEEPTIME / const.REFRESH_RATE_COEF - t_code)
-                time.sleep(t_sleep)
+                # Sleep until the next frame deadline (on the monotonic clock, so that the pace does not drift)
+                now = time.monotonic_ns()
+                if deadline > now:
+                    time.sleep((deadline - now) / 1e9)
+                    deadline += period
+                else:
+                    # Running late, so start the next period from now instead of catching up
+                    deadline = now + period
 
     pygame.quit()
 
@@ -5,6 +5,9 @@ from adapters.plot_adapter import PlotAdapter
 from adapters.screen_adapter import ScreenAdapter
 
 class VisualManager:
+    """
+    Selects the visual adapter once and exposes its update(trackbuffer, detObj=None, frame_number=0) as self.update.
+    """
     def __init__(self):
         if const.SCREEN_CONNECTED:
             self.visual = ScreenAdapter()
@@ -13,5 +16,4 @@ class VisualManager:
         else:
             self.visual = PlotAdapter()
 
-    def update(self, trackbuffer, frame_number=0, detObj=None):
-        self.visual.update(trackbuffer, detObj=detObj, frame_number=frame_number)
\ No newline at end of file
+        self.update = self.visual.update
@@ -0,0 +1,46 @@
+import hashlib
+import random
+
+import pygame
+
+from games.breakout.breakout import Breakout
+
+
+def play(full_redraw, n_frames=1500):
+    """
+    Play a scripted game and return a digest of the screen after each frame.
+
+    With full_redraw set, every frame repaints the whole screen instead of only the changed areas.
+    """
+    rng = random.Random(0)
+    game = Breakout()
+    game.start()
+
+    screens = []
+    for frame in range(n_frames):
+        # The paddle often stands still, as it does when the player does not move
+        displacement = rng.choice([0, 0, rng.uniform(-15, 15)])
+
+        if full_redraw:
+            game.full_redraw = True
+        game.move(displacement)
+
+        if game.game_over != 0:
+            game.ball.reset(game.player_paddle.rect.centerx, game.player_paddle.y)
+        if frame == 1000:
+            game.live_ball = False
+        if frame == 1010:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN))
+
+        screens.append(hashlib.md5(pygame.image.tobytes(game.screen, "RGB")).digest())
+
+    pygame.quit()
+    return screens
+
+
+def test_dirty_rects_match_full_redraw():
+    expected = play(full_redraw=True)
+    screens = play(full_redraw=False)
+
+    mismatches = [frame for frame, (a, b) in enumerate(zip(screens, expected)) if a != b]
+    assert not mismatches, f"first differing frame: {mismatches[0]}"
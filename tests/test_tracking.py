@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pytest
+from filterpy.kalman import KalmanFilter
+
+import constants as const
+from Tracking import BatchedData, TrackBuffer, kf_predict, kf_update
+from Utils import normalize_data
+
+# Track states of the original (filterpy based, per-track) tracker on the scene of make_scene
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "data", "tracking_baseline.npz")
+
+
+def make_scene(seed=0, n_frames=300):
+    """
+    Generate the raw sensor frames of two people walking in front of the sensor. The second one
+    leaves the scene, and a third one enters after a while.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for f in range(n_frames):
+        t = f * 0.05
+        centres = [(-0.8 + 0.3 * np.sin(t / 3), 1.5 + 0.8 * np.sin(t / 4), 0.0)]
+        if f < 120:
+            centres.append((0.8, 2.5 - 0.6 * np.sin(t / 5), 0.0))
+        elif f >= 200:
+            centres.append((1.5 - 0.01 * (f - 200), 3.0, 0.0))
+
+        frame = [
+            np.column_stack(
+                [
+                    rng.normal(cx, 0.1, 50),
+                    rng.normal(cy, 0.1, 50),
+                    rng.normal(cz, 0.3, 50),
+                    rng.normal(0, 0.3, 50),
+                    rng.uniform(10, 100, 50),
+                ]
+            )
+            for cx, cy, cz in centres
+        ]
+        frames.append(np.concatenate(frame))
+    return frames
+
+
+def run_tracking(frames, dt=0.05):
+    """
+    Track the frames and return the states of the effective tracks after each frame.
+    """
+    trackbuffer = TrackBuffer()
+    batch = BatchedData()
+    states = []
+    for frame in frames:
+        detObj = {
+            "x": frame[:, 0],
+            "y": frame[:, 1],
+            "z": frame[:, 2],
+            "doppler": frame[:, 3],
+            "peakVal": frame[:, 4],
+        }
+        effective_data = normalize_data(detObj)
+        trackbuffer.dt = dt
+        if effective_data.shape[0] != 0:
+            trackbuffer.track(effective_data, batch)
+        # The states are views of the packed track storage, so they are copied
+        states.append([np.array(track.state.x).ravel() for track in trackbuffer.effective_tracks])
+    return states
+
+
+def test_kf_matches_filterpy():
+    rng = np.random.default_rng(0)
+    dim_x, dim_z = const.MOTION_MODEL.KF_DIM
+
+    kf = KalmanFilter(dim_x=dim_x, dim_z=dim_z)
+    kf.F = np.asarray(const.MOTION_MODEL.KF_F(0.05))
+    kf.Q = np.asarray(const.MOTION_MODEL.KF_Q_DISCR(0.05))
+    kf.H = np.asarray(const.MOTION_MODEL.KF_H)
+    kf.x = rng.normal(size=(dim_x, 1))
+    kf.P = np.eye(dim_x) * const.KF_P_INIT
+
+    x, P = kf.x.copy(), kf.P.copy()
+    for _ in range(50):
+        kf.predict()
+        x, P = kf_predict(x, P, kf.F, kf.Q)
+        np.testing.assert_allclose(x, kf.x, atol=1e-9)
+        np.testing.assert_allclose(P, kf.P, atol=1e-9)
+
+        z = kf.H @ kf.x + rng.normal(0, const.KF_R_STD, (dim_z, 1))
+        R = np.eye(dim_z) * rng.uniform(0.01, 0.1)
+        kf.update(z, R=R)
+        x, P = kf_update(x, P, z, kf.H, R)
+        np.testing.assert_allclose(x, kf.x, atol=1e-9)
+        np.testing.assert_allclose(P, kf.P, atol=1e-9)
+
+
+def test_tracking_matches_baseline(capsys):
+    baseline = np.load(BASELINE_PATH)
+    counts, baseline_states = baseline["counts"], baseline["states"]
+
+    states = run_tracking(make_scene())
+
+    assert [len(frame_states) for frame_states in states] == counts.tolist()
+    np.testing.assert_allclose(np.concatenate([s for s in states if s]), baseline_states, atol=1e-4)
@@ -0,0 +1,236 @@
+import builtins
+import importlib
+import math
+
+import numpy as np
+import pytest
+
+import constants as const
+import Utils
+from Utils import OfflineManager
+
+LOG_KEYS = ["x", "y", "z", "doppler", "peakVal", "posix"]
+
+
+def reference_normalize_data(detObj):
+    """
+    The original, per-point implementation of normalize_data.
+    """
+    ang_rad = np.radians(const.S_TILT)
+    T = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, const.S_HEIGHT], [0, 0, 0, 1]])
+    R_inv = np.array(
+        [
+            [1, 0, 0, 0],
+            [0, np.cos(ang_rad), -np.sin(ang_rad), 0],
+            [0, np.sin(ang_rad), np.cos(ang_rad), 0],
+            [0, 0, 0, 1],
+        ]
+    )
+
+    input_data = np.vstack(
+        (detObj["x"], detObj["y"], detObj["z"], detObj["doppler"], detObj["peakVal"])
+    ).T
+    ef_data = np.empty((0, 8), dtype="float")
+
+    for x, y, z, doppler, peak_val in input_data:
+        # Transform the radial velocity into Cartesian
+        r = math.sqrt(x**2 + y**2 + z**2)
+        if r == 0:
+            vx, vy, vz = 0, doppler, 0
+        else:
+            vx, vy, vz = doppler * x / r, doppler * y / r, doppler * z / r
+
+        coords = T @ R_inv @ [x, y, z, 1]
+        velocities = T @ R_inv @ [vx, vy, vz, 0]
+        point = [*coords[:3], *velocities[:3], doppler, peak_val]
+
+        # Scene constraints filtering
+        if 0 < point[2] <= const.TR_Z_THRESH and point[1] > 0:
+            ef_data = np.append(ef_data, [point], axis=0)
+
+    return ef_data
+
+
+@pytest.fixture(params=[const.S_TILT, 15, -30])
+def sensor_tilt(request):
+    # The sensor-to-world transform is built at import, so Utils is reloaded for each tilt
+    original = const.S_TILT
+    const.S_TILT = request.param
+    importlib.reload(Utils)
+    yield request.param
+    const.S_TILT = original
+    importlib.reload(Utils)
+
+
+@pytest.mark.parametrize("n_points", [0, 1, 5, 300])
+def test_normalize_data_matches_reference(sensor_tilt, n_points):
+    rng = np.random.default_rng(n_points)
+    data = rng.normal(0, 1.5, (n_points, 5))
+    if n_points > 3:
+        # A point at the sensor origin has no radial direction
+        data[2, :3] = 0
+    detObj = {key: list(data[:, i]) for i, key in enumerate(["x", "y", "z", "doppler", "peakVal"])}
+
+    expected = reference_normalize_data(detObj)
+    result = Utils.normalize_data(detObj)
+
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+def write_experiment(path, n_frames=300, frames_per_file=70, shuffle=False):
+    """
+    Write a generated experiment, with some frames missing, and return its points per frame.
+    """
+    rng = np.random.default_rng(0)
+    frames = {}
+    lines = []
+    file_index = 1
+    for framenum in range(1, n_frames + 1):
+        if rng.random() >= 0.1:
+            points = np.round(rng.normal(size=(int(rng.integers(1, 12)), 5)), 4)
+            posix = 1700000000000 + framenum * 100
+            frames[framenum] = np.column_stack([points, np.full(len(points), posix)])
+            lines += [f"{framenum}," + ",".join(map(str, row)) + f",{posix}" for row in points]
+
+        if framenum % frames_per_file == 0 or framenum == n_frames:
+            if shuffle:
+                rng.shuffle(lines)
+            (path / f"{file_index}.csv").write_text("\n".join(lines) + "\n")
+            lines = []
+            file_index += 1
+
+    return frames
+
+
+def read_experiment(path):
+    manager = OfflineManager(str(path))
+    frames = {}
+    while not manager.is_finished():
+        exists, framenum, data = manager.get_data()
+        if exists:
+            frames[framenum] = np.column_stack([data[key] for key in LOG_KEYS])
+    return frames
+
+
+def test_offline_manager_reads_all_frames(tmp_path):
+    expected = write_experiment(tmp_path)
+    frames = read_experiment(tmp_path)
+
+    assert frames.keys() == expected.keys()
+    for framenum, points in expected.items():
+        np.testing.assert_allclose(frames[framenum], points)
+
+
+def test_offline_manager_reads_unordered_frames(tmp_path):
+    expected = write_experiment(tmp_path, shuffle=True)
+    frames = read_experiment(tmp_path)
+
+    assert frames.keys() == expected.keys()
+    for framenum, points in expected.items():
+        # Only the order of the points within a frame may change
+        np.testing.assert_allclose(np.unique(frames[framenum], axis=0), np.unique(points, axis=0))
+
+
+def test_offline_manager_empty_experiment(tmp_path):
+    assert read_experiment(tmp_path) == {}
+
+
+def test_offline_manager_raises_on_malformed_row(tmp_path):
+    write_experiment(tmp_path)
+    with open(tmp_path / "3.csv", "a") as file:
+        file.write("300,abc,1,1,1,1,1\n")
+
+    with pytest.raises(ValueError):
+        read_experiment(tmp_path)
+
+
+def make_pointcloud(seed=0):
+    """
+    Generate three person-sized clouds of points with some noise around them.
+    """
+    rng = np.random.default_rng(seed)
+    centres = [(-1.0, 2.0, 1.0), (0.5, 3.0, 1.0), (1.5, 1.5, 1.0)]
+    clouds = [rng.normal(centre, [0.1, 0.1, 0.4], (80, 3)) for centre in centres]
+    clouds.append(rng.uniform([-2, 0.5, 0], [2, 4, 2], (30, 3)))
+    points = np.concatenate(clouds)
+    return np.column_stack([points, rng.normal(size=(len(points), 5))])
+
+
+def test_dist_matrix_matches_metric():
+    pointcloud = make_pointcloud()[:60]
+    expected = [
+        [Utils.calculate_euclidean_dist(p1, p2) for p2 in pointcloud] for p1 in pointcloud
+    ]
+
+    np.testing.assert_allclose(Utils.calculate_euclidean_dist_matrix(pointcloud), expected, atol=1e-5)
+
+
+def test_dbscan_dist_graph_matches_matrix(monkeypatch):
+    pointcloud = make_pointcloud()
+    expected = Utils.cluster_pointcloud_dbscan(pointcloud)
+
+    # Cluster the same points on the sparse neighbourhood graph
+    monkeypatch.setattr(const, "DB_DENSE_MAX_POINTS", 10)
+    clusters = Utils.cluster_pointcloud_dbscan(pointcloud)
+
+    assert len(clusters) == len(expected) == 3
+    for cluster, expected_cluster in zip(clusters, expected):
+        np.testing.assert_array_equal(cluster, expected_cluster)
+
+
+@pytest.fixture
+def no_gpu_modules(monkeypatch):
+    """
+    Make CuPy and cuML unavailable, and record the attempts to import them.
+    """
+    attempts = []
+    real_import = builtins.__import__
+
+    def failing_import(name, *args, **kwargs):
+        if name.split(".")[0] in ("cupy", "cuml"):
+            attempts.append(name)
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", failing_import)
+    monkeypatch.setattr(Utils, "_GPU_DBSCAN", None)
+    return attempts
+
+
+def test_gpu_import_failure_is_cached(no_gpu_modules):
+    assert Utils._import_gpu_dbscan() is None
+    assert Utils._import_gpu_dbscan() is None
+    assert len(no_gpu_modules) == 1
+
+
+def test_dbscan_gpu_falls_back_to_cpu(monkeypatch, no_gpu_modules):
+    pointcloud = make_pointcloud()
+    expected = Utils.cluster_pointcloud_dbscan(pointcloud)
+
+    monkeypatch.setattr(const, "DB_USE_GPU", True)
+    monkeypatch.setattr(const, "DB_GPU_MIN_POINTS", 10)
+    clusters = Utils.cluster_pointcloud_dbscan(pointcloud)
+    Utils.cluster_pointcloud_dbscan(pointcloud)
+
+    assert len(no_gpu_modules) == 1
+    assert len(clusters) == len(expected) == 3
+    for cluster, expected_cluster in zip(clusters, expected):
+        np.testing.assert_array_equal(cluster, expected_cluster)
+
+
+@pytest.mark.parametrize("min_points, uses_gpu", [(10, True), (10000, False)])
+def test_dbscan_gpu_min_points(monkeypatch, no_gpu_modules, min_points, uses_gpu):
+    calls = []
+    fit_predict_dbscan_gpu = Utils._fit_predict_dbscan_gpu
+
+    def spy(pointcloud, eps, min_samples):
+        calls.append(len(pointcloud))
+        return fit_predict_dbscan_gpu(pointcloud, eps, min_samples)
+
+    monkeypatch.setattr(Utils, "_fit_predict_dbscan_gpu", spy)
+    monkeypatch.setattr(const, "DB_USE_GPU", True)
+    monkeypatch.setattr(const, "DB_GPU_MIN_POINTS", min_points)
+
+    assert len(Utils.cluster_pointcloud_dbscan(make_pointcloud())) == 3
+    assert bool(calls) == uses_gpu